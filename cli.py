@@ -2,44 +2,117 @@
 
 This module exists to keep lightweight subcommands (like `--version`) fast and
 side-effect free for `uvx` usage.
+
+Keep module-level imports limited to the standard library essentials: the
+`--version` path must not import `config`, `asyncio`, `server` or any provider
+code when the package is installed.
 """
 
 from __future__ import annotations
 
-import argparse
-import asyncio
 import sys
 
-from config import __version__
+
+def __getattr__(name: str):
+    # Resolve `cli.__version__` on demand so importing this module doesn't load `config`.
+    if name == "__version__":
+        from config import __version__
+
+        return __version__
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _print_version() -> None:
+    # `config.__version__` is the single version source shared with the server and the
+    # `version` tool. Read the literal from the module file instead of importing `config`,
+    # which would pull in its dependencies.
+    from importlib.util import find_spec
+
+    try:
+        spec = find_spec("config")
+        with open(spec.origin, encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("__version__"):
+                    print(line.split("=", 1)[1].strip().strip("\"'"))
+                    return
+    except (AttributeError, OSError, TypeError, ValueError):
+        pass
+
+    # Unusual layouts (e.g. zipped or compiled-only installs): fall back to importing it.
+    from config import __version__
+
+    print(__version__)
+
+
+_USAGE = "usage: pally-mcp-server [-h] [--version] {start-mcp-server} ..."
+
+_HELP = f"""{_USAGE}
+
+positional arguments:
+  {{start-mcp-server}}
+    start-mcp-server  Start the MCP server using stdio transport.
+
+options:
+  -h, --help          show this help message and exit
+  --version           Print Pally MCP Server version and exit.
+"""
+
+
+def _parse(argv: list[str]) -> dict:
+    """Classify argv in a single pass; this CLI is too small to justify argparse."""
+
+    parsed: dict = {"help": False, "version": False, "command": None, "unknown": []}
+    for arg in argv:
+        if arg in ("-h", "--help"):
+            parsed["help"] = True
+        elif arg == "--version":
+            parsed["version"] = True
+        elif parsed["command"] is None and not arg.startswith("-"):
+            parsed["command"] = arg
+        else:
+            parsed["unknown"].append(arg)
+    return parsed
+
+
+def _error(message: str) -> None:
+    sys.stderr.write(f"pally-mcp-server: error: {message}\n")
+    sys.exit(2)
+
+
+def _run_server() -> None:
+    # Import lazily so `--version` doesn't trigger asyncio or server initialization.
+    import asyncio
+
+    from server import main as server_main
+
+    asyncio.run(server_main())
 
 
 def main() -> None:
     """Entry point for the `pally-mcp-server` console script."""
 
-    parser = argparse.ArgumentParser(prog="pally-mcp-server", add_help=True)
-    parser.add_argument(
-        "--version",
-        action="store_true",
-        help="Print Pally MCP Server version and exit.",
-    )
-    subparsers = parser.add_subparsers(dest="command")
-    subparsers.add_parser("start-mcp-server", help="Start the MCP server using stdio transport.")
-
-    args, unknown = parser.parse_known_args(sys.argv[1:])
-    if unknown:
-        parser.error(f"unrecognized arguments: {' '.join(unknown)}")
-
-    if args.version:
-        print(__version__)
+    argv = sys.argv[1:]
+    if argv == ["--version"]:
+        _print_version()
         return
 
-    if args.command not in (None, "start-mcp-server"):
-        parser.error(f"unknown command: {args.command}")
+    args = _parse(argv)
 
-    # Import lazily so `--version` doesn't trigger server initialization.
-    from server import main as server_main
+    if args["help"]:
+        sys.stdout.write(_HELP)
+        return
 
-    asyncio.run(server_main())
+    if args["command"] not in (None, "start-mcp-server"):
+        _error(f"unknown command: {args['command']}")
+
+    if args["unknown"]:
+        _error(f"unrecognized arguments: {' '.join(args['unknown'])}")
+
+    if args["version"]:
+        _print_version()
+        return
+
+    _run_server()
 
 
 if __name__ == "__main__":  # pragma: no cover
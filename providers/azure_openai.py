@@ -13,7 +13,7 @@ except ImportError:  # pragma: no cover
 from utils.env import get_env, suppress_env_vars
 
 from .openai import OpenAIModelProvider
-from .openai_compatible import OpenAICompatibleProvider
+from .openai_compatible import OpenAICompatibleProvider, parse_allowed_models_csv
 from .registries.azure import AzureModelRegistry
 from .shared import ModelCapabilities, ModelResponse, ProviderType, TemperatureConstraint
 
@@ -333,7 +333,7 @@ class AzureOpenAIProvider(OpenAICompatibleProvider):
         # clearer AZURE_OPENAI_ALLOWED_MODELS alias.
         explicit = get_env("AZURE_OPENAI_ALLOWED_MODELS")
         if explicit:
-            models = {m.strip().lower() for m in explicit.split(",") if m.strip()}
+            models = set(parse_allowed_models_csv(explicit))
             if models:
                 logger.info("Configured allowed models for Azure OpenAI: %s", sorted(models))
                 self._allowed_alias_cache = {}
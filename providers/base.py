@@ -1,10 +1,13 @@
 """Base interfaces and common behaviour for model providers."""
 
 import logging
+import random
 import threading
 import time
 from abc import ABC, abstractmethod
 from contextlib import AbstractContextManager
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 from typing import TYPE_CHECKING, Any, Callable, Optional
 
 if TYPE_CHECKING:
@@ -41,6 +44,9 @@ class ModelProvider(ABC):
     # All concrete providers must define their supported models
     MODEL_CAPABILITIES: dict[str, Any] = {}
 
+    # Upper bound on honouring a server's Retry-After so one response can't stall a tool call.
+    MAX_RETRY_AFTER_SECONDS = 60.0
+
     def __init__(self, api_key: str, **kwargs):
         """Initialize the provider with API key and optional configuration."""
         self.api_key = api_key
@@ -250,6 +256,30 @@ class ModelProvider(ABC):
 
         return any(indicator in error_str for indicator in retryable_indicators)
 
+    @staticmethod
+    def _get_retry_after_seconds(error: Exception) -> Optional[float]:
+        """Return the Retry-After delay advertised on an HTTP error response, if any."""
+
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if headers is None:
+            return None
+
+        try:
+            retry_after_ms = headers.get("retry-after-ms")
+            if retry_after_ms is not None:
+                return max(float(retry_after_ms) / 1000, 0.0)
+
+            retry_after = headers.get("retry-after")
+            if retry_after is None:
+                return None
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max((retry_at - datetime.now(retry_at.tzinfo)).total_seconds(), 0.0)
+        except Exception:
+            return None
+
     def _run_with_retries(
         self,
         operation: Callable[[], Any],
@@ -294,10 +324,18 @@ class ModelProvider(ABC):
 
                 delay_idx = min(attempt_index, len(delays) - 1) if delays else -1
                 delay = delays[delay_idx] if delay_idx >= 0 else 0.0
+                if delay > 0:
+                    # Jitter within [delay/2, delay] so concurrent callers don't retry in lockstep.
+                    delay = random.uniform(delay / 2, delay)
+
+                # A server-provided Retry-After is a floor: retrying sooner is just rejected again.
+                retry_after = self._get_retry_after_seconds(exc)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.MAX_RETRY_AFTER_SECONDS))
 
                 if delay > 0:
                     logger.warning(
-                        "%s retryable error (attempt %s/%s): %s. Retrying in %ss...",
+                        "%s retryable error (attempt %s/%s): %s. Retrying in %.1fs...",
                         log_prefix or self.__class__.__name__,
                         attempt_number,
                         attempts,
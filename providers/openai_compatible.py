@@ -1,18 +1,36 @@
 """Base class for OpenAI-compatible API providers."""
 
 import asyncio
-import copy
+import atexit
+import importlib.util
 import ipaddress
 import json
 import logging
+import re
+import threading
 import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Optional
 from urllib.parse import urlparse
 
+import httpx
 from openai import OpenAI
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 from utils.env import get_env, suppress_env_vars
-from utils.image_utils import validate_image
+from utils.image_utils import build_image_data_url, validate_image
+from utils.response_cache import (
+    get_response_cache_dir,
+    load_cached_response,
+    response_cache_key,
+    store_cached_response,
+)
 
 from .base import ModelProvider
 from .shared import (
@@ -21,6 +39,252 @@ from .shared import (
     ProviderType,
 )
 
+logger = logging.getLogger(__name__)
+
+# orjson decodes SSE frames several times faster than the stdlib parser and its
+# JSONDecodeError subclasses json.JSONDecodeError, so error handling is shared.
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _json_dumps_indented(value: object) -> str:
+    """Pretty-print ``value`` for logs, using orjson's native indenter when available."""
+
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, indent=2, ensure_ascii=False)
+
+
+# Proxy variables are stripped while HTTP clients are built; clients keep the resulting
+# transport configuration, so no per-request suppression is needed.
+_PROXY_ENV_VARS = ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy")
+
+# SSE framing constants for the OpenRouter streaming loops.
+_SSE_DATA_PREFIX = b"data:"
+_SSE_DATA_PREFIX_LEN = len(_SSE_DATA_PREFIX)
+_SSE_DONE = b"[DONE]"
+
+# OpenRouter's keep-alive comment (": OPENROUTER PROCESSING"), matched case-insensitively on raw bytes.
+_OPENROUTER_PROCESSING_RE = re.compile(rb":(?=.*OPENROUTER)(?=.*PROCESSING)", re.IGNORECASE)
+
+# Extra generate_content kwargs forwarded to the API, and the subset reasoning models reject.
+_PASSTHROUGH_KWARGS = frozenset({"top_p", "frequency_penalty", "presence_penalty", "seed", "stop", "stream"})
+_SAMPLING_ONLY_KWARGS = frozenset({"top_p", "frequency_penalty", "presence_penalty", "stream"})
+
+# Chat role -> (responses-endpoint role, content item type); other roles are dropped.
+# For o3-pro, system messages should be handled carefully to avoid policy violations:
+# instead of prefixing with "System:", the system content is included naturally as user input.
+_RESPONSES_INPUT_ROLES = {
+    "system": ("user", "input_text"),
+    "user": ("user", "input_text"),
+    "assistant": ("assistant", "output_text"),
+}
+
+# Errors embed their payload as "{...}" (first "{" to last "}" on a line).
+_ERROR_JSON_RE = re.compile(r"\{.*\}")
+
+# Substrings marking a non-429 error as transient, matched in one pass over the lowercased message.
+_RETRYABLE_ERROR_RE = re.compile(
+    "|".join(
+        [
+            "timeout",
+            "connection",
+            "network",
+            "temporary",
+            "unavailable",
+            "retry",
+            "408",  # Request timeout
+            "500",  # Internal server error
+            "502",  # Bad gateway
+            "503",  # Service unavailable
+            "504",  # Gateway timeout
+            "ssl",  # SSL errors
+            "handshake",  # Handshake failures
+        ]
+    )
+)
+
+
+def _to_int(value: object) -> int:
+    """Coerce a token count from a usage block, treating missing or malformed values as 0."""
+
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+@lru_cache(maxsize=64)
+def parse_allowed_models_csv(models_str: str) -> frozenset[str]:
+    """Parse a comma-separated allow-list into lowercase names (cached per raw value)."""
+
+    return frozenset(m.strip().lower() for m in models_str.split(",") if m.strip())
+
+
+@lru_cache(maxsize=64)
+def _tiktoken_encoding(model_name: str):
+    """Return the tiktoken encoding for ``model_name``, or None when tiktoken is not installed.
+
+    Cached per model so repeated token counts skip both the encoding lookup and the
+    failed-import path search when tiktoken is absent.
+    """
+
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+async def _aiter_sse_lines(byte_iter):
+    """Split an SSE byte stream into raw lines without decoding it to text."""
+
+    pending = b""
+    async for chunk in byte_iter:
+        if pending:
+            chunk = pending + chunk
+        lines = chunk.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _truncate_message_text(message: object) -> object:
+    """Return ``message`` with long text content items truncated, leaving the original untouched."""
+
+    if not isinstance(message, dict):
+        return message
+    content = message.get("content")
+    if not isinstance(content, list):
+        return message
+
+    truncated_content = []
+    changed = False
+    for item in content:
+        if isinstance(item, dict) and "text" in item and len(item["text"]) > 100:
+            item = {**item, "text": item["text"][:100] + "... [truncated]"}
+            changed = True
+        truncated_content.append(item)
+
+    return {**message, "content": truncated_content} if changed else message
+
+
+class _SharedHttpClient(httpx.Client):
+    """Process-wide pool handed to several SDK clients.
+
+    ``OpenAI.close()`` closes its ``http_client``; ignoring that here keeps one
+    provider's shutdown from killing the pool other providers still use. The pool
+    itself is closed by ``_close_shared_http_clients`` at interpreter exit.
+    """
+
+    def close(self) -> None:
+        pass
+
+    def close_pool(self) -> None:
+        super().close()
+
+
+_SHARED_HTTP_CLIENTS: dict[tuple, _SharedHttpClient] = {}
+_SHARED_HTTP_CLIENTS_LOCK = threading.Lock()
+
+
+def _get_shared_http_client(base_url: Optional[str], timeout_config: httpx.Timeout) -> httpx.Client:
+    """Return the process-wide httpx client for an endpoint and timeout profile.
+
+    Providers are re-created on key rotation and registry resets; sharing the pool
+    lets a new instance reuse open keep-alive connections instead of paying a fresh
+    TCP/TLS handshake. Must be called with proxy variables suppressed.
+    """
+
+    key = (base_url or "", timeout_config.connect, timeout_config.read, timeout_config.write, timeout_config.pool)
+    with _SHARED_HTTP_CLIENTS_LOCK:
+        client = _SHARED_HTTP_CLIENTS.get(key)
+        if client is None:
+            if not _SHARED_HTTP_CLIENTS:
+                atexit.register(_close_shared_http_clients)
+            client = _SharedHttpClient(
+                timeout=timeout_config,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0),
+            )
+            _SHARED_HTTP_CLIENTS[key] = client
+        return client
+
+
+def _close_shared_http_clients() -> None:
+    """Close every shared httpx client (registered with atexit on first use)."""
+
+    with _SHARED_HTTP_CLIENTS_LOCK:
+        clients = list(_SHARED_HTTP_CLIENTS.values())
+        _SHARED_HTTP_CLIENTS.clear()
+    for client in clients:
+        try:
+            client.close_pool()
+        except Exception:  # pragma: no cover - best effort during interpreter shutdown
+            pass
+
+
+def _stop_event_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Ask ``loop`` to stop from another thread; no-op once it has been closed."""
+
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def _run_streaming_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Streaming thread target: run ``loop`` until it is stopped, then close it."""
+
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
+
+
+async def _close_streaming_client(loop: asyncio.AbstractEventLoop, client: Optional[httpx.AsyncClient]) -> None:
+    """Close the pooled streaming client and finalise abandoned SSE generators."""
+
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception as exc:
+            logger.debug("Failed to close OpenRouter streaming client: %s", exc)
+
+    # Finalise SSE line generators abandoned mid-stream, as asyncio.run() does on exit.
+    try:
+        await loop.shutdown_asyncgens()
+    except Exception as exc:
+        logger.debug("Failed to shut down OpenRouter streaming generators: %s", exc)
+
+
+def _shutdown_streaming_loop(
+    loop: asyncio.AbstractEventLoop, thread: threading.Thread, client: Optional[httpx.AsyncClient]
+) -> None:
+    """Close ``client`` on ``loop`` and stop the loop; its thread closes the loop on exit.
+
+    Runs from ``close()`` and from the finalizer of a provider discarded without it
+    (e.g. on key rotation), so neither path leaks the thread or pooled connections.
+    """
+
+    if loop.is_closed():
+        return
+    if threading.current_thread() is thread:
+        # Collected on the loop thread itself: blocking on the loop would deadlock.
+        task = loop.create_task(_close_streaming_client(loop, client))
+        task.add_done_callback(lambda _task: loop.stop())
+        return
+
+    try:
+        asyncio.run_coroutine_threadsafe(_close_streaming_client(loop, client), loop).result(timeout=10)
+    except Exception as exc:
+        logger.debug("Failed to clean up OpenRouter streaming loop: %s", exc)
+    _stop_event_loop(loop)
+    thread.join(timeout=5)
+
 
 class OpenAICompatibleProvider(ModelProvider):
     """Shared implementation for OpenAI API lookalikes.
@@ -35,6 +299,18 @@ class OpenAICompatibleProvider(ModelProvider):
     FRIENDLY_NAME = "OpenAI Compatible"
     _OPENROUTER_PROCESSING_TIMEOUT_DEFAULT_SEC = 15.0
 
+    # (connect, read, write, pool) timeouts in seconds for each kind of endpoint.
+    _DEFAULT_TIMEOUTS = (30.0, 600.0, 600.0, 600.0)  # 30s connect (vs OpenAI's 5s), 10 minutes otherwise
+    _LOCAL_TIMEOUTS = (60.0, 1800.0, 1800.0, 1800.0)  # 1 minute connect, 30 minutes for extended thinking
+    _CUSTOM_REMOTE_TIMEOUTS = (45.0, 900.0, 900.0, 900.0)  # 45s connect, 15 minutes otherwise
+    # (kwarg, environment variable) override sources, in the same order as the profiles above.
+    _TIMEOUT_OVERRIDES = (
+        ("connect_timeout", "CUSTOM_CONNECT_TIMEOUT"),
+        ("read_timeout", "CUSTOM_READ_TIMEOUT"),
+        ("write_timeout", "CUSTOM_WRITE_TIMEOUT"),
+        ("pool_timeout", "CUSTOM_POOL_TIMEOUT"),
+    )
+
     def __init__(self, api_key: str, base_url: str = None, **kwargs):
         """Initialize the provider with API key and optional base URL.
 
@@ -46,9 +322,26 @@ class OpenAICompatibleProvider(ModelProvider):
         self._allowed_alias_cache: dict[str, str] = {}
         super().__init__(api_key, **kwargs)
         self._client = None
+        self._openai_client_lock = threading.Lock()
+        # OpenRouter streaming runs on a provider-owned event loop so the pooled
+        # AsyncClient (and its keep-alive connections) survive across calls.
+        self._streaming_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._streaming_thread: Optional[threading.Thread] = None
+        self._streaming_loop_lock = threading.Lock()
+        self._streaming_finalizer: Optional[weakref.finalize] = None
+        self._async_client = None
         self.base_url = base_url
+        try:
+            self._parsed_base_url = urlparse(base_url) if base_url else None
+        except ValueError:
+            # Malformed URLs are reported by _validate_base_url below.
+            self._parsed_base_url = None
         self.organization = kwargs.get("organization")
         self.allowed_models = self._parse_allowed_models()
+        # Canonical names reachable from allow-list aliases, filled in on the first miss.
+        self._allowed_canonical: set[str] = set()
+        self._pending_allowed_entries: Optional[list[str]] = None
+        self._is_local = self._is_localhost_url()
 
         # Configure timeouts - especially important for custom/local endpoints
         self.timeout_config = self._configure_timeouts(**kwargs)
@@ -58,10 +351,11 @@ class OpenAICompatibleProvider(ModelProvider):
             self._validate_base_url()
 
         # Warn if using external URL without authentication
-        if self.base_url and not self._is_localhost_url() and not api_key:
-            logging.warning(
-                f"Using external URL '{self.base_url}' without API key. "
-                "This may be insecure. Consider setting an API key for authentication."
+        if self.base_url and not self._is_local and not api_key:
+            logger.warning(
+                "Using external URL '%s' without API key. "
+                "This may be insecure. Consider setting an API key for authentication.",
+                self.base_url,
             )
 
     def _get_openrouter_processing_timeout_sec(self) -> float:
@@ -73,14 +367,14 @@ class OpenAICompatibleProvider(ModelProvider):
         try:
             value = float(raw)
         except (TypeError, ValueError):
-            logging.warning(
+            logger.warning(
                 "Invalid OPENROUTER_PROCESSING_TIMEOUT value '%s'; using default of %ss",
                 raw,
                 self._OPENROUTER_PROCESSING_TIMEOUT_DEFAULT_SEC,
             )
             return self._OPENROUTER_PROCESSING_TIMEOUT_DEFAULT_SEC
         if value <= 0:
-            logging.warning(
+            logger.warning(
                 "Non-positive OPENROUTER_PROCESSING_TIMEOUT value '%s'; using default of %ss",
                 raw,
                 self._OPENROUTER_PROCESSING_TIMEOUT_DEFAULT_SEC,
@@ -94,29 +388,19 @@ class OpenAICompatibleProvider(ModelProvider):
         if not isinstance(usage, dict):
             return None
 
-        # OpenAI chat-completions-style usage
-        prompt_tokens = usage.get("prompt_tokens")
-        completion_tokens = usage.get("completion_tokens")
-        total_tokens = usage.get("total_tokens")
+        get = usage.get
+        total_tokens = get("total_tokens")
 
-        # OpenAI responses-style usage
+        # OpenAI chat-completions-style usage, falling back to responses-style keys
+        prompt_tokens = get("prompt_tokens")
+        completion_tokens = get("completion_tokens")
         if prompt_tokens is None and completion_tokens is None and total_tokens is None:
-            prompt_tokens = usage.get("input_tokens")
-            completion_tokens = usage.get("output_tokens")
-            total_tokens = usage.get("total_tokens")
-
-        def _to_int(value: object) -> int:
-            try:
-                return int(value or 0)
-            except (TypeError, ValueError):
-                return 0
+            prompt_tokens = get("input_tokens")
+            completion_tokens = get("output_tokens")
 
         input_tokens = _to_int(prompt_tokens)
         output_tokens = _to_int(completion_tokens)
-        if total_tokens is None:
-            total_tokens_value = input_tokens + output_tokens
-        else:
-            total_tokens_value = _to_int(total_tokens)
+        total_tokens_value = input_tokens + output_tokens if total_tokens is None else _to_int(total_tokens)
 
         if input_tokens == 0 and output_tokens == 0 and total_tokens_value == 0:
             return None
@@ -138,7 +422,20 @@ class OpenAICompatibleProvider(ModelProvider):
             raise ValueError("OpenRouter streaming requires base_url to be configured.")
         return f"{self.base_url.rstrip('/')}/{path.lstrip('/')}"
 
-    async def _wait_for_openrouter_first_activity_line(self, line_iter, *, timeout_sec: float) -> str:
+    def _extract_last_usage(self, usage_blocks: list[dict]) -> Optional[dict[str, int]]:
+        """Return the most recent streamed usage block that carries token counts.
+
+        Normally the last block is used as-is; earlier ones only matter when a later
+        frame sends an all-zero or unrecognised block.
+        """
+
+        for block in reversed(usage_blocks):
+            usage = self._extract_usage_dict(block)
+            if usage is not None:
+                return usage
+        return None
+
+    async def _wait_for_openrouter_first_activity_line(self, line_iter, *, timeout_sec: float) -> bytes:
         """Wait up to ``timeout_sec`` for the first OpenRouter SSE activity line."""
 
         deadline = time.monotonic() + timeout_sec
@@ -164,24 +461,56 @@ class OpenAICompatibleProvider(ModelProvider):
                     f"(OPENROUTER_PROCESSING_TIMEOUT={timeout_sec})."
                 ) from exc
 
-            if not line:
-                continue
-
-            stripped = line.strip()
-            if not stripped:
-                continue
-
-            if stripped.startswith("data:"):
+            if line.startswith(_SSE_DATA_PREFIX):
                 return line
 
             # OpenRouter keep-alive comment (as documented by OpenRouter).
-            if stripped.startswith(":") and "OPENROUTER" in stripped.upper() and "PROCESSING" in stripped.upper():
+            if _OPENROUTER_PROCESSING_RE.match(line):
                 return line
 
-    async def _iter_with_first(self, first: str, line_iter):
-        yield first
-        async for line in line_iter:
-            yield line
+    def _get_streaming_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the provider-owned event loop, starting its thread on first use."""
+
+        with self._streaming_loop_lock:
+            if self._streaming_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=_run_streaming_loop,
+                    args=(loop,),
+                    name=f"pally-{self.get_provider_type().value}-streaming",
+                    daemon=True,
+                )
+                thread.start()
+                # Shut the loop down like close() if the provider is discarded without it (e.g. rotation).
+                self._streaming_finalizer = weakref.finalize(self, _shutdown_streaming_loop, loop, thread, None)
+                self._streaming_loop = loop
+                self._streaming_thread = thread
+            return self._streaming_loop
+
+    def _get_async_client(self):
+        """Return the pooled AsyncClient; must be called on the streaming loop."""
+
+        if self._async_client is None:
+            # HTTP/2 lets concurrent calls share one TLS connection, but httpx only supports
+            # it when the optional `h2` package (httpx[http2]) is installed.
+            http2 = importlib.util.find_spec("h2") is not None
+
+            # Proxies are resolved when the client is built, so suppressing them once is enough.
+            with suppress_env_vars(*_PROXY_ENV_VARS):
+                self._async_client = httpx.AsyncClient(
+                    transport=getattr(self, "_test_transport", None),
+                    timeout=self.timeout_config,
+                    follow_redirects=True,
+                    http2=http2,
+                    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60.0),
+                )
+            # Re-register the finalizer so a discarded provider also closes this client.
+            with self._streaming_loop_lock:
+                if self._streaming_finalizer is not None and self._streaming_finalizer.detach() is not None:
+                    self._streaming_finalizer = weakref.finalize(
+                        self, _shutdown_streaming_loop, self._streaming_loop, self._streaming_thread, self._async_client
+                    )
+        return self._async_client
 
     def _run_async(self, coro):
         """Run a coroutine from sync provider code (provider calls run in worker threads)."""
@@ -189,29 +518,66 @@ class OpenAICompatibleProvider(ModelProvider):
         try:
             asyncio.get_running_loop()
         except RuntimeError:
-            return asyncio.run(coro)
+            return asyncio.run_coroutine_threadsafe(coro, self._get_streaming_loop()).result()
         raise RuntimeError("Cannot run OpenRouter streaming from an active event loop thread.")
 
+    def _run_openrouter_stream(
+        self,
+        call,
+        *,
+        url: str,
+        completion_params: dict,
+        model_name: str,
+    ) -> ModelResponse:
+        """Run a streaming coroutine factory, serving identical requests from the opt-in response cache."""
+
+        cache_dir = get_response_cache_dir()
+        if cache_dir is None:
+            return self._run_async(call())
+
+        cache_key = response_cache_key(self.get_provider_type(), model_name, {"url": url, "body": completion_params})
+        cached = load_cached_response(cache_dir, cache_key)
+        if cached is not None:
+            logger.debug("Serving %s response for %s from response cache (%s)", url, model_name, cache_key)
+            cached.metadata["response_cache_hit"] = True
+            return cached
+
+        response = self._run_async(call())
+        store_cached_response(cache_dir, cache_key, response)
+        return response
+
+    def close(self) -> None:
+        """Close the pooled streaming client and stop the streaming event loop."""
+
+        with self._streaming_loop_lock:
+            loop, thread = self._streaming_loop, self._streaming_thread
+            client, finalizer = self._async_client, self._streaming_finalizer
+            self._streaming_loop = self._streaming_thread = self._async_client = None
+            self._streaming_finalizer = None
+
+        if finalizer is not None:
+            finalizer.detach()
+        if loop is None:
+            return
+        _shutdown_streaming_loop(loop, thread, client)
+
     def _extract_output_text_from_responses_payload(self, response_payload: dict) -> str:
         output = response_payload.get("output")
         if not isinstance(output, list):
             return ""
 
-        parts: list[str] = []
-        for item in output:
-            if not isinstance(item, dict):
-                continue
-            content = item.get("content")
-            if not isinstance(content, list):
-                continue
-            for content_item in content:
-                if not isinstance(content_item, dict):
-                    continue
-                if content_item.get("type") == "output_text":
-                    text = content_item.get("text")
-                    if isinstance(text, str):
-                        parts.append(text)
-        return "".join(parts)
+        # str.join materialises any iterable first, so a list comprehension is the cheapest single pass.
+        return "".join(
+            [
+                content_item["text"]
+                for item in output
+                if isinstance(item, dict) and isinstance(item.get("content"), list)
+                for content_item in item["content"]
+                if isinstance(content_item, dict)
+                and content_item.get("type") == "output_text"
+                and isinstance(content_item.get("text"), str)
+            ]
+        )
 
     def _generate_openrouter_chat_completions_streaming(
         self,
@@ -221,103 +587,105 @@ class OpenAICompatibleProvider(ModelProvider):
     ) -> ModelResponse:
         """Execute an OpenRouter chat completion via SSE and aggregate the final content."""
 
-        import httpx
-
         timeout_sec = self._get_openrouter_processing_timeout_sec()
         url = self._openrouter_url("/chat/completions")
         headers = self._openrouter_headers()
 
         async def _call() -> ModelResponse:
-            proxy_env_vars = ["HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"]
-            transport = getattr(self, "_test_transport", None)
+            client = self._get_async_client()
+            async with client.stream("POST", url, json=completion_params, headers=headers) as response:
+                if response.status_code >= 400:
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    raise RuntimeError(
+                        f"OpenRouter streaming request failed (status={response.status_code}): {body[:2000]}"
+                    )
 
-            with suppress_env_vars(*proxy_env_vars):
-                async with httpx.AsyncClient(
-                    transport=transport,
-                    timeout=self.timeout_config,
-                    follow_redirects=True,
-                    headers=headers,
-                ) as client:
-                    async with client.stream("POST", url, json=completion_params) as response:
-                        if response.status_code >= 400:
-                            body = (await response.aread()).decode("utf-8", errors="replace")
-                            raise RuntimeError(
-                                f"OpenRouter streaming request failed (status={response.status_code}): {body[:2000]}"
-                            )
-
-                        line_iter = response.aiter_lines()
-                        first_line = await self._wait_for_openrouter_first_activity_line(line_iter, timeout_sec=timeout_sec)
-
-                        content_parts: list[str] = []
-                        usage: Optional[dict[str, int]] = None
-                        metadata: dict[str, object] = {"endpoint": "chat_completions", "streaming": True}
-
-                        async for line in self._iter_with_first(first_line, line_iter):
-                            if not line:
-                                continue
+                line_iter = _aiter_sse_lines(response.aiter_bytes())
+                first_line = await self._wait_for_openrouter_first_activity_line(line_iter, timeout_sec=timeout_sec)
 
-                            stripped = line.strip()
-                            if not stripped:
-                                continue
+                content_parts: list[str] = []
+                usage_blocks: list[dict] = []
+                metadata: dict[str, object] = {"endpoint": "chat_completions", "streaming": True}
 
-                            # Ignore OpenRouter keep-alive comments.
-                            if stripped.startswith(":"):
-                                continue
+                def _handle_line(line: bytes) -> bool:
+                    """Consume one SSE line; return True once the stream is finished."""
 
-                            if not stripped.startswith("data:"):
-                                continue
+                    # Blank separators, keep-alive comments and other SSE fields carry no payload.
+                    if not line.startswith(_SSE_DATA_PREFIX):
+                        return False
+
+                    # SSE allows one optional space after the colon; any other surrounding
+                    # whitespace (including a CRLF's trailing \r) is valid JSON whitespace.
+                    data = line[_SSE_DATA_PREFIX_LEN:]
+                    if data[:1] == b" ":
+                        data = data[1:]
+                    if data.startswith(_SSE_DONE):
+                        return True
 
-                            data = stripped[len("data:") :].lstrip()
-                            if data == "[DONE]":
-                                break
+                    try:
+                        payload = _json_loads(data)
+                    except json.JSONDecodeError as exc:
+                        raise RuntimeError(
+                            f"OpenRouter streaming sent invalid JSON chunk: {data[:2000].decode('utf-8', errors='replace')}"
+                        ) from exc
 
+                    try:
+                        payload_get = payload.get
+                    except AttributeError:
+                        # Non-object frames carry nothing we use.
+                        return False
+
+                    error = payload_get("error")
+                    if error:
+                        raise RuntimeError(f"OpenRouter streaming error: {error}")
+
+                    # Stream identity is constant across frames; record each field once.
+                    if "id" not in metadata and payload_get("id"):
+                        metadata["id"] = payload["id"]
+                    if "created" not in metadata and payload_get("created") is not None:
+                        metadata["created"] = payload["created"]
+                    if "model" not in metadata and payload_get("model"):
+                        metadata["model"] = payload["model"]
+
+                    # Usage blocks are cumulative; collect them and extract once the stream ends.
+                    frame_usage = payload_get("usage")
+                    if frame_usage and isinstance(frame_usage, dict):
+                        usage_blocks.append(frame_usage)
+
+                    choices = payload_get("choices")
+                    if isinstance(choices, list):
+                        for choice in choices:
                             try:
-                                payload = json.loads(data)
-                            except json.JSONDecodeError as exc:
-                                raise RuntimeError(f"OpenRouter streaming sent invalid JSON chunk: {data[:2000]}") from exc
-
-                            if isinstance(payload, dict) and payload.get("error"):
-                                raise RuntimeError(f"OpenRouter streaming error: {payload.get('error')}")
-
-                            if isinstance(payload, dict):
-                                if payload.get("id"):
-                                    metadata["id"] = payload.get("id")
-                                if payload.get("created") is not None:
-                                    metadata["created"] = payload.get("created")
-                                if payload.get("model"):
-                                    metadata["model"] = payload.get("model")
-
-                                extracted = self._extract_usage_dict(payload.get("usage"))
-                                if extracted is not None:
-                                    usage = extracted
-
-                                choices = payload.get("choices")
-                                if isinstance(choices, list):
-                                    for choice in choices:
-                                        if not isinstance(choice, dict):
-                                            continue
-                                        finish_reason = choice.get("finish_reason")
-                                        if finish_reason is not None:
-                                            metadata["finish_reason"] = finish_reason
-                                        delta = choice.get("delta")
-                                        if isinstance(delta, dict):
-                                            token = delta.get("content")
-                                            if isinstance(token, str) and token:
-                                                content_parts.append(token)
-
-                        return ModelResponse(
-                            content="".join(content_parts),
-                            usage=usage,
-                            model_name=model_name,
-                            friendly_name=self.FRIENDLY_NAME,
-                            provider=self.get_provider_type(),
-                            metadata=metadata,
-                        )
+                                finish_reason = choice.get("finish_reason")
+                                if finish_reason is not None:
+                                    metadata["finish_reason"] = finish_reason
+                                token = choice["delta"]["content"]
+                            except (KeyError, TypeError, AttributeError):
+                                continue
+                            if token and isinstance(token, str):
+                                content_parts.append(token)
+                    return False
+
+                if not _handle_line(first_line):
+                    async for line in line_iter:
+                        if _handle_line(line):
+                            break
+
+                return ModelResponse(
+                    content="".join(content_parts),
+                    usage=self._extract_last_usage(usage_blocks),
+                    model_name=model_name,
+                    friendly_name=self.FRIENDLY_NAME,
+                    provider=self.get_provider_type(),
+                    metadata=metadata,
+                )
 
         try:
-            return self._run_async(_call())
+            return self._run_openrouter_stream(
+                _call, url=url, completion_params=completion_params, model_name=model_name
+            )
         except TimeoutError as exc:
-            logging.warning(
+            logger.warning(
                 "OpenRouter streaming timed out waiting for first activity (timeout=%ss model=%s endpoint=chat_completions): %s",
                 timeout_sec,
                 model_name,
@@ -333,117 +701,128 @@ class OpenAICompatibleProvider(ModelProvider):
     ) -> ModelResponse:
         """Execute an OpenRouter responses call via SSE and extract final output text."""
 
-        import httpx
-
         timeout_sec = self._get_openrouter_processing_timeout_sec()
         url = self._openrouter_url("/responses")
         headers = self._openrouter_headers()
 
         async def _call() -> ModelResponse:
-            proxy_env_vars = ["HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"]
-            transport = getattr(self, "_test_transport", None)
+            client = self._get_async_client()
+            async with client.stream("POST", url, json=completion_params, headers=headers) as response:
+                if response.status_code >= 400:
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    raise RuntimeError(
+                        f"OpenRouter streaming request failed (status={response.status_code}): {body[:2000]}"
+                    )
 
-            with suppress_env_vars(*proxy_env_vars):
-                async with httpx.AsyncClient(
-                    transport=transport,
-                    timeout=self.timeout_config,
-                    follow_redirects=True,
-                    headers=headers,
-                ) as client:
-                    async with client.stream("POST", url, json=completion_params) as response:
-                        if response.status_code >= 400:
-                            body = (await response.aread()).decode("utf-8", errors="replace")
-                            raise RuntimeError(
-                                f"OpenRouter streaming request failed (status={response.status_code}): {body[:2000]}"
-                            )
-
-                        line_iter = response.aiter_lines()
-                        first_line = await self._wait_for_openrouter_first_activity_line(line_iter, timeout_sec=timeout_sec)
-
-                        completed_response: Optional[dict] = None
-                        output_parts: list[str] = []
-                        usage: Optional[dict[str, int]] = None
-                        metadata: dict[str, object] = {"endpoint": "responses", "streaming": True}
-
-                        async for line in self._iter_with_first(first_line, line_iter):
-                            if not line:
-                                continue
+                line_iter = _aiter_sse_lines(response.aiter_bytes())
+                first_line = await self._wait_for_openrouter_first_activity_line(line_iter, timeout_sec=timeout_sec)
 
-                            stripped = line.strip()
-                            if not stripped:
-                                continue
+                completed_response: Optional[dict] = None
+                output_parts: list[str] = []
+                usage_blocks: list[dict] = []
+                metadata: dict[str, object] = {"endpoint": "responses", "streaming": True}
+                last_event_type: Optional[str] = None
 
-                            if stripped.startswith(":"):
-                                continue
+                def _handle_line(line: bytes) -> bool:
+                    """Consume one SSE line; return True once the stream is finished."""
 
-                            if not stripped.startswith("data:"):
-                                continue
+                    nonlocal completed_response, last_event_type
 
-                            data = stripped[len("data:") :].lstrip()
-                            if data == "[DONE]":
-                                break
+                    # Blank separators, keep-alive comments and other SSE fields carry no payload.
+                    if not line.startswith(_SSE_DATA_PREFIX):
+                        return False
 
-                            try:
-                                event = json.loads(data)
-                            except json.JSONDecodeError as exc:
-                                raise RuntimeError(
-                                    f"OpenRouter responses stream sent invalid JSON event: {data[:2000]}"
-                                ) from exc
+                    # SSE allows one optional space after the colon; any other surrounding
+                    # whitespace (including a CRLF's trailing \r) is valid JSON whitespace.
+                    data = line[_SSE_DATA_PREFIX_LEN:]
+                    if data[:1] == b" ":
+                        data = data[1:]
+                    if data.startswith(_SSE_DONE):
+                        return True
 
-                            if isinstance(event, dict) and event.get("error"):
-                                raise RuntimeError(f"OpenRouter responses stream error: {event.get('error')}")
+                    try:
+                        event = _json_loads(data)
+                    except json.JSONDecodeError as exc:
+                        raise RuntimeError(
+                            f"OpenRouter responses stream sent invalid JSON event: {data[:2000].decode('utf-8', errors='replace')}"
+                        ) from exc
 
-                            if not isinstance(event, dict):
-                                continue
+                    try:
+                        event_get = event.get
+                    except AttributeError:
+                        # Non-object events carry nothing we use.
+                        return False
 
-                            event_type = event.get("type")
-                            if isinstance(event_type, str):
-                                metadata["last_event_type"] = event_type
-
-                            response_obj = event.get("response")
-                            if isinstance(response_obj, dict):
-                                if response_obj.get("id"):
-                                    metadata["id"] = response_obj.get("id")
-                                if response_obj.get("created_at") is not None:
-                                    metadata["created"] = response_obj.get("created_at")
-                                if response_obj.get("model"):
-                                    metadata["model"] = response_obj.get("model")
-                                extracted = self._extract_usage_dict(response_obj.get("usage"))
-                                if extracted is not None:
-                                    usage = extracted
-
-                            # Capture deltas as a fallback if response.completed is not delivered.
-                            if event_type == "response.output_text.delta":
-                                delta = event.get("delta")
-                                if isinstance(delta, str) and delta:
-                                    output_parts.append(delta)
-
-                            if event_type == "response.completed" and isinstance(response_obj, dict):
-                                completed_response = response_obj
-                                break
-
-                            if event_type in {"response.failed", "response.error"}:
-                                raise RuntimeError(f"OpenRouter responses stream failed ({event_type}): {event}")
-
-                        content = ""
-                        if completed_response is not None:
-                            content = self._extract_output_text_from_responses_payload(completed_response)
-                        if not content:
-                            content = "".join(output_parts)
-
-                        return ModelResponse(
-                            content=content,
-                            usage=usage,
-                            model_name=model_name,
-                            friendly_name=self.FRIENDLY_NAME,
-                            provider=self.get_provider_type(),
-                            metadata=metadata,
-                        )
+                    error = event_get("error")
+                    if error:
+                        raise RuntimeError(f"OpenRouter responses stream error: {error}")
+
+                    event_type = event_get("type")
+                    if isinstance(event_type, str):
+                        last_event_type = event_type
+
+                    response_obj = event_get("response")
+                    if response_obj is not None:
+                        try:
+                            response_get = response_obj.get
+                        except AttributeError:
+                            response_obj = None
+                        else:
+                            # Response identity is constant across events; record each field once.
+                            if "id" not in metadata and response_get("id"):
+                                metadata["id"] = response_obj["id"]
+                            if "created" not in metadata and response_get("created_at") is not None:
+                                metadata["created"] = response_obj["created_at"]
+                            if "model" not in metadata and response_get("model"):
+                                metadata["model"] = response_obj["model"]
+                            # Usage blocks are cumulative; collect them and extract once the stream ends.
+                            event_usage = response_get("usage")
+                            if event_usage and isinstance(event_usage, dict):
+                                usage_blocks.append(event_usage)
+
+                    # Capture deltas as a fallback if response.completed is not delivered.
+                    if event_type == "response.output_text.delta":
+                        delta = event_get("delta")
+                        if delta and isinstance(delta, str):
+                            output_parts.append(delta)
+
+                    if event_type == "response.completed" and response_obj is not None:
+                        completed_response = response_obj
+                        return True
+
+                    if event_type in {"response.failed", "response.error"}:
+                        raise RuntimeError(f"OpenRouter responses stream failed ({event_type}): {event}")
+                    return False
+
+                if not _handle_line(first_line):
+                    async for line in line_iter:
+                        if _handle_line(line):
+                            break
+
+                if last_event_type is not None:
+                    metadata["last_event_type"] = last_event_type
+
+                content = ""
+                if completed_response is not None:
+                    content = self._extract_output_text_from_responses_payload(completed_response)
+                if not content:
+                    content = "".join(output_parts)
+
+                return ModelResponse(
+                    content=content,
+                    usage=self._extract_last_usage(usage_blocks),
+                    model_name=model_name,
+                    friendly_name=self.FRIENDLY_NAME,
+                    provider=self.get_provider_type(),
+                    metadata=metadata,
+                )
 
         try:
-            return self._run_async(_call())
+            return self._run_openrouter_stream(
+                _call, url=url, completion_params=completion_params, model_name=model_name
+            )
         except TimeoutError as exc:
-            logging.warning(
+            logger.warning(
                 "OpenRouter responses streaming timed out waiting for first activity (timeout=%ss model=%s): %s",
                 timeout_sec,
                 model_name,
@@ -465,34 +844,48 @@ class OpenAICompatibleProvider(ModelProvider):
             requested = requested_name.lower()
             canonical = canonical_name.lower()
 
-            if requested not in self.allowed_models and canonical not in self.allowed_models:
-                allowed = False
-                for allowed_entry in list(self.allowed_models):
-                    normalized_resolved = self._allowed_alias_cache.get(allowed_entry)
-                    if normalized_resolved is None:
-                        try:
-                            resolved_name = self._resolve_model_name(allowed_entry)
-                        except Exception:
-                            continue
-
-                        if not resolved_name:
-                            continue
-
-                        normalized_resolved = resolved_name.lower()
-                        self._allowed_alias_cache[allowed_entry] = normalized_resolved
-
-                    if normalized_resolved == canonical:
-                        # Canonical match discovered via alias resolution – mark as allowed and
-                        # memoise the canonical entry for future lookups.
-                        allowed = True
-                        self._allowed_alias_cache[canonical] = canonical
-                        self.allowed_models.add(canonical)
-                        break
-
-                if not allowed:
-                    raise ValueError(
-                        f"Model '{requested_name}' is not allowed by restriction policy. Allowed models: {sorted(self.allowed_models)}"
-                    )
+            if requested in self.allowed_models or canonical in self.allowed_models:
+                return
+
+            if canonical not in self._allowed_canonical:
+                self._resolve_pending_allowed_entries()
+
+            if canonical not in self._allowed_canonical:
+                raise ValueError(
+                    f"Model '{requested_name}' is not allowed by restriction policy. Allowed models: {sorted(self.allowed_models)}"
+                )
+
+            # Canonical match discovered via alias resolution – memoise the canonical entry.
+            self._allowed_alias_cache[canonical] = canonical
+            self.allowed_models.add(canonical)
+
+    def _resolve_pending_allowed_entries(self) -> None:
+        """Resolve allow-list entries to canonical names, retrying only entries that failed before."""
+
+        pending = self._pending_allowed_entries
+        if pending is None:
+            pending = list(self.allowed_models)
+
+        unresolved: list[str] = []
+        for allowed_entry in pending:
+            normalized_resolved = self._allowed_alias_cache.get(allowed_entry)
+            if normalized_resolved is None:
+                try:
+                    resolved_name = self._resolve_model_name(allowed_entry)
+                except Exception:
+                    unresolved.append(allowed_entry)
+                    continue
+
+                if not resolved_name:
+                    unresolved.append(allowed_entry)
+                    continue
+
+                normalized_resolved = resolved_name.lower()
+                self._allowed_alias_cache[allowed_entry] = normalized_resolved
+
+            self._allowed_canonical.add(normalized_resolved)
+
+        self._pending_allowed_entries = unresolved
 
     def _parse_allowed_models(self) -> Optional[set[str]]:
         """Parse allowed models from environment variable.
@@ -501,23 +894,26 @@ class OpenAICompatibleProvider(ModelProvider):
             Set of allowed model names (lowercase) or None if not configured
         """
         # Get provider-specific allowed models
-        provider_type = self.get_provider_type().value.upper()
-        env_var = f"{provider_type}_ALLOWED_MODELS"
+        provider_type = self.get_provider_type()
+        env_var = f"{provider_type.value.upper()}_ALLOWED_MODELS"
         models_str = get_env(env_var, "") or ""
 
         if models_str:
-            # Parse and normalize to lowercase for case-insensitive comparison
-            models = {m.strip().lower() for m in models_str.split(",") if m.strip()}
+            # Parse and normalize to lowercase for case-insensitive comparison. The parsed
+            # result is shared per raw value; copy it because alias matches are added later.
+            models = set(parse_allowed_models_csv(models_str))
             if models:
-                logging.info(f"Configured allowed models for {self.FRIENDLY_NAME}: {sorted(models)}")
+                logger.info("Configured allowed models for %s: %s", self.FRIENDLY_NAME, sorted(models))
                 self._allowed_alias_cache = {}
                 return models
 
         # Log info if no allow-list configured for proxy providers
-        if self.get_provider_type() not in [ProviderType.GOOGLE, ProviderType.OPENAI]:
-            logging.info(
-                f"Model allow-list not configured for {self.FRIENDLY_NAME} - all models permitted. "
-                f"To restrict access, set {env_var} with comma-separated model names."
+        if provider_type not in [ProviderType.GOOGLE, ProviderType.OPENAI]:
+            logger.info(
+                "Model allow-list not configured for %s - all models permitted. "
+                "To restrict access, set %s with comma-separated model names.",
+                self.FRIENDLY_NAME,
+                env_var,
             )
 
         return None
@@ -533,54 +929,33 @@ class OpenAICompatibleProvider(ModelProvider):
         Returns:
             httpx.Timeout object with appropriate timeout settings
         """
-        import httpx
-
-        # Default timeouts - more generous for custom/local endpoints
-        default_connect = 30.0  # 30 seconds for connection (vs OpenAI's 5s)
-        default_read = 600.0  # 10 minutes for reading (same as OpenAI default)
-        default_write = 600.0  # 10 minutes for writing
-        default_pool = 600.0  # 10 minutes for pool
-
-        # For custom/local URLs, use even longer timeouts
-        if self.base_url and self._is_localhost_url():
-            default_connect = 60.0  # 1 minute for local connections
-            default_read = 1800.0  # 30 minutes for local models (extended thinking)
-            default_write = 1800.0  # 30 minutes for local models
-            default_pool = 1800.0  # 30 minutes for local models
-            logging.info(f"Using extended timeouts for local endpoint: {self.base_url}")
+        if self.base_url and self._is_local:
+            profile = self._LOCAL_TIMEOUTS
+            logger.info("Using extended timeouts for local endpoint: %s", self.base_url)
         elif self.base_url:
-            default_connect = 45.0  # 45 seconds for custom remote endpoints
-            default_read = 900.0  # 15 minutes for custom remote endpoints
-            default_write = 900.0  # 15 minutes for custom remote endpoints
-            default_pool = 900.0  # 15 minutes for custom remote endpoints
-            logging.info(f"Using extended timeouts for custom endpoint: {self.base_url}")
-
-        # Allow override via kwargs or environment variables in future, for now...
-        connect_timeout = kwargs.get("connect_timeout")
-        if connect_timeout is None:
-            connect_timeout_raw = get_env("CUSTOM_CONNECT_TIMEOUT")
-            connect_timeout = float(connect_timeout_raw) if connect_timeout_raw is not None else float(default_connect)
-
-        read_timeout = kwargs.get("read_timeout")
-        if read_timeout is None:
-            read_timeout_raw = get_env("CUSTOM_READ_TIMEOUT")
-            read_timeout = float(read_timeout_raw) if read_timeout_raw is not None else float(default_read)
-
-        write_timeout = kwargs.get("write_timeout")
-        if write_timeout is None:
-            write_timeout_raw = get_env("CUSTOM_WRITE_TIMEOUT")
-            write_timeout = float(write_timeout_raw) if write_timeout_raw is not None else float(default_write)
-
-        pool_timeout = kwargs.get("pool_timeout")
-        if pool_timeout is None:
-            pool_timeout_raw = get_env("CUSTOM_POOL_TIMEOUT")
-            pool_timeout = float(pool_timeout_raw) if pool_timeout_raw is not None else float(default_pool)
+            profile = self._CUSTOM_REMOTE_TIMEOUTS
+            logger.info("Using extended timeouts for custom endpoint: %s", self.base_url)
+        else:
+            profile = self._DEFAULT_TIMEOUTS
+
+        # Explicit kwargs win, then environment overrides, then the profile default.
+        resolved = []
+        for (kwarg, env_var), default in zip(self._TIMEOUT_OVERRIDES, profile):
+            value = kwargs.get(kwarg)
+            if value is None:
+                raw = get_env(env_var)
+                value = float(raw) if raw is not None else default
+            resolved.append(value)
+        connect_timeout, read_timeout, write_timeout, pool_timeout = resolved
 
         timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=write_timeout, pool=pool_timeout)
 
-        logging.debug(
-            f"Configured timeouts - Connect: {connect_timeout}s, Read: {read_timeout}s, "
-            f"Write: {write_timeout}s, Pool: {pool_timeout}s"
+        logger.debug(
+            "Configured timeouts - Connect: %ss, Read: %ss, Write: %ss, Pool: %ss",
+            connect_timeout,
+            read_timeout,
+            write_timeout,
+            pool_timeout,
         )
 
         return timeout
@@ -591,11 +966,11 @@ class OpenAICompatibleProvider(ModelProvider):
         Returns:
             True if URL is localhost or local network, False otherwise
         """
-        if not self.base_url:
+        parsed = self._parsed_base_url
+        if parsed is None:
             return False
 
         try:
-            parsed = urlparse(self.base_url)
             hostname = parsed.hostname
 
             # Check for common localhost patterns
@@ -625,7 +1000,8 @@ class OpenAICompatibleProvider(ModelProvider):
             return
 
         try:
-            parsed = urlparse(self.base_url)
+            # Re-parse only when the cached parse failed so the original error is reported.
+            parsed = self._parsed_base_url or urlparse(self.base_url)
 
             # Check URL scheme - only allow http/https
             if parsed.scheme not in ("http", "https"):
@@ -647,77 +1023,80 @@ class OpenAICompatibleProvider(ModelProvider):
     @property
     def client(self):
         """Lazy initialization of OpenAI client with security checks and timeout configuration."""
-        if self._client is None:
-            import httpx
-
-            proxy_env_vars = ["HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"]
+        # Fast path: once built, the client is read without taking the lock.
+        client = self._client
+        if client is not None:
+            return client
+
+        with self._openai_client_lock:
+            # Re-check: another thread may have built the client while we waited.
+            if self._client is None:
+                self._client = self._create_client()
+            return self._client
+
+    def _create_client(self) -> OpenAI:
+        """Build the OpenAI SDK client; nothing is cached if construction fails."""
+        with suppress_env_vars(*_PROXY_ENV_VARS):
+            try:
+                # Create a custom httpx client that explicitly avoids proxy parameters
+                timeout_config = (
+                    self.timeout_config
+                    if hasattr(self, "timeout_config") and self.timeout_config
+                    else httpx.Timeout(30.0)
+                )
 
-            with suppress_env_vars(*proxy_env_vars):
-                try:
-                    # Create a custom httpx client that explicitly avoids proxy parameters
-                    timeout_config = (
-                        self.timeout_config
-                        if hasattr(self, "timeout_config") and self.timeout_config
-                        else httpx.Timeout(30.0)
+                # Create httpx client with minimal config to avoid proxy conflicts
+                # Note: proxies parameter was removed in httpx 0.28.0
+                # Check for test transport injection
+                if hasattr(self, "_test_transport"):
+                    # Use custom transport for testing (HTTP recording/replay)
+                    http_client = httpx.Client(
+                        transport=self._test_transport,
+                        timeout=timeout_config,
+                        follow_redirects=True,
                     )
+                else:
+                    # Normal production client, shared with other providers for the same endpoint
+                    http_client = _get_shared_http_client(self.base_url, timeout_config)
+
+                # Keep client initialization minimal to avoid proxy parameter conflicts
+                client_kwargs = {
+                    "api_key": self.api_key,
+                    "http_client": http_client,
+                }
 
-                    # Create httpx client with minimal config to avoid proxy conflicts
-                    # Note: proxies parameter was removed in httpx 0.28.0
-                    # Check for test transport injection
-                    if hasattr(self, "_test_transport"):
-                        # Use custom transport for testing (HTTP recording/replay)
-                        http_client = httpx.Client(
-                            transport=self._test_transport,
-                            timeout=timeout_config,
-                            follow_redirects=True,
-                        )
-                    else:
-                        # Normal production client
-                        http_client = httpx.Client(
-                            timeout=timeout_config,
-                            follow_redirects=True,
-                        )
-
-                    # Keep client initialization minimal to avoid proxy parameter conflicts
-                    client_kwargs = {
-                        "api_key": self.api_key,
-                        "http_client": http_client,
-                    }
-
-                    if self.base_url:
-                        client_kwargs["base_url"] = self.base_url
-
-                    if self.organization:
-                        client_kwargs["organization"] = self.organization
+                if self.base_url:
+                    client_kwargs["base_url"] = self.base_url
 
-                    # Add default headers if any
-                    if self.DEFAULT_HEADERS:
-                        client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
+                if self.organization:
+                    client_kwargs["organization"] = self.organization
 
-                    logging.debug(
-                        "OpenAI client initialized with custom httpx client and timeout: %s",
-                        timeout_config,
-                    )
+                # Add default headers if any
+                if self.DEFAULT_HEADERS:
+                    client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
 
-                    # Create OpenAI client with custom httpx client
-                    self._client = OpenAI(**client_kwargs)
+                logger.debug(
+                    "OpenAI client initialized with custom httpx client and timeout: %s",
+                    timeout_config,
+                )
 
-                except Exception as e:
-                    # If all else fails, try absolute minimal client without custom httpx
-                    logging.warning(
-                        "Failed to create client with custom httpx, falling back to minimal config: %s",
-                        e,
-                    )
-                    try:
-                        minimal_kwargs = {"api_key": self.api_key}
-                        if self.base_url:
-                            minimal_kwargs["base_url"] = self.base_url
-                        self._client = OpenAI(**minimal_kwargs)
-                    except Exception as fallback_error:
-                        logging.error("Even minimal OpenAI client creation failed: %s", fallback_error)
-                        raise
+                # Create OpenAI client with custom httpx client
+                return OpenAI(**client_kwargs)
 
-        return self._client
+            except Exception as e:
+                # If all else fails, try absolute minimal client without custom httpx
+                logger.warning(
+                    "Failed to create client with custom httpx, falling back to minimal config: %s",
+                    e,
+                )
+                try:
+                    minimal_kwargs = {"api_key": self.api_key}
+                    if self.base_url:
+                        minimal_kwargs["base_url"] = self.base_url
+                    return OpenAI(**minimal_kwargs)
+                except Exception as fallback_error:
+                    logger.error("Even minimal OpenAI client creation failed: %s", fallback_error)
+                    raise
 
     def _sanitize_for_logging(self, params: dict) -> dict:
         """Sanitize sensitive data from parameters before logging.
@@ -728,22 +1107,14 @@ class OpenAICompatibleProvider(ModelProvider):
         Returns:
             dict: Sanitized copy of parameters safe for logging
         """
-        sanitized = copy.deepcopy(params)
-
-        # Sanitize messages content
-        if "input" in sanitized:
-            for msg in sanitized.get("input", []):
-                if isinstance(msg, dict) and "content" in msg:
-                    for content_item in msg.get("content", []):
-                        if isinstance(content_item, dict) and "text" in content_item:
-                            # Truncate long text and add ellipsis
-                            text = content_item["text"]
-                            if len(text) > 100:
-                                content_item["text"] = text[:100] + "... [truncated]"
-
         # Remove any API keys that might be in headers/auth
-        sanitized.pop("api_key", None)
-        sanitized.pop("authorization", None)
+        sanitized = {key: value for key, value in params.items() if key not in ("api_key", "authorization")}
+
+        # Only containers holding truncated text are copied; everything else is shared with
+        # ``params``, which is safe because the result is only serialised for logging.
+        messages = sanitized.get("input")
+        if isinstance(messages, list):
+            sanitized["input"] = [_truncate_message_text(msg) for msg in messages]
 
         return sanitized
 
@@ -759,14 +1130,13 @@ class OpenAICompatibleProvider(ModelProvider):
         Raises:
             ValueError: If output_text is missing, None, or not a string
         """
-        logging.debug(f"Response object type: {type(response)}")
-        logging.debug(f"Response attributes: {dir(response)}")
+        logger.debug("Response type: %s has_output_text=%s", type(response).__name__, hasattr(response, "output_text"))
 
         if not hasattr(response, "output_text"):
             raise ValueError(f"o3-pro response missing output_text field. Response type: {type(response).__name__}")
 
         content = response.output_text
-        logging.debug(f"Extracted output_text: '{content}' (type: {type(content)})")
+        logger.debug("Extracted output_text: '%s' (type: %s)", content, type(content))
 
         if content is None:
             raise ValueError("o3-pro returned None for output_text")
@@ -788,25 +1158,20 @@ class OpenAICompatibleProvider(ModelProvider):
         """Generate content using the /v1/responses endpoint for reasoning models."""
         # Convert messages to the correct format for responses endpoint
         input_messages = []
+        append = input_messages.append
 
         for message in messages:
-            role = message.get("role", "")
-            content = message.get("content", "")
-
-            if role == "system":
-                # For o3-pro, system messages should be handled carefully to avoid policy violations
-                # Instead of prefixing with "System:", we'll include the system content naturally
-                input_messages.append({"role": "user", "content": [{"type": "input_text", "text": content}]})
-            elif role == "user":
-                input_messages.append({"role": "user", "content": [{"type": "input_text", "text": content}]})
-            elif role == "assistant":
-                input_messages.append({"role": "assistant", "content": [{"type": "output_text", "text": content}]})
+            target = _RESPONSES_INPUT_ROLES.get(message.get("role", ""))
+            if target is not None:
+                role, content_type = target
+                append({"role": role, "content": [{"type": content_type, "text": message.get("content", "")}]})
 
         # Prepare completion parameters for responses endpoint
         # Based on OpenAI documentation, use nested reasoning object for responses endpoint
-        effort = "medium"
-        if capabilities and capabilities.default_reasoning_effort:
-            effort = capabilities.default_reasoning_effort
+        effort = (capabilities.default_reasoning_effort if capabilities else None) or "medium"
+        provider_type = self.get_provider_type()
+        friendly_name = self.FRIENDLY_NAME
+        is_openrouter = provider_type == ProviderType.OPENROUTER
 
         completion_params = {
             "model": model_name,
@@ -818,10 +1183,10 @@ class OpenAICompatibleProvider(ModelProvider):
         # OpenRouter's /responses endpoint rejects store:true via Zod validation (Issue #348).
         # This is an endpoint-level limitation, not model-specific, so we omit for all
         # OpenRouter /responses calls. If OpenRouter later supports store, revisit this logic.
-        if self.get_provider_type() != ProviderType.OPENROUTER:
+        if not is_openrouter:
             completion_params["store"] = True
         else:
-            logging.debug(f"Omitting 'store' parameter for OpenRouter provider (model: {model_name})")
+            logger.debug("Omitting 'store' parameter for OpenRouter provider (model: %s)", model_name)
 
         # Add max tokens if specified (using max_completion_tokens for responses endpoint)
         if max_output_tokens:
@@ -830,6 +1195,11 @@ class OpenAICompatibleProvider(ModelProvider):
         # For responses endpoint, we only add parameters that are explicitly supported
         # Remove unsupported chat completion parameters that may cause API errors
 
+        # OpenRouter calls are streamed so its keep-alive comments can be watched for first activity
+        use_openrouter_streaming = is_openrouter and bool(self.base_url)
+        if use_openrouter_streaming:
+            completion_params["stream"] = True
+
         # Retry logic with progressive delays
         max_retries = 4
         retry_delays = [1, 3, 5, 8]
@@ -837,15 +1207,14 @@ class OpenAICompatibleProvider(ModelProvider):
 
         def _attempt() -> ModelResponse:
             attempt_counter["value"] += 1
-            import json
-
-            sanitized_params = self._sanitize_for_logging(completion_params)
-            logging.info(
-                f"o3-pro API request (sanitized): {json.dumps(sanitized_params, indent=2, ensure_ascii=False)}"
-            )
+            if logger.isEnabledFor(logging.INFO):
+                sanitized_params = self._sanitize_for_logging(completion_params)
+                logger.info(
+                    "o3-pro API request (sanitized): %s",
+                    _json_dumps_indented(sanitized_params),
+                )
 
-            if self.get_provider_type() == ProviderType.OPENROUTER and self.base_url:
-                completion_params["stream"] = True
+            if use_openrouter_streaming:
                 return self._generate_openrouter_responses_streaming(
                     completion_params=completion_params,
                     model_name=model_name,
@@ -871,8 +1240,8 @@ class OpenAICompatibleProvider(ModelProvider):
                 content=content,
                 usage=usage,
                 model_name=model_name,
-                friendly_name=self.FRIENDLY_NAME,
-                provider=self.get_provider_type(),
+                friendly_name=friendly_name,
+                provider=provider_type,
                 metadata={
                     "model": getattr(response, "model", model_name),
                     "id": getattr(response, "id", ""),
@@ -891,7 +1260,7 @@ class OpenAICompatibleProvider(ModelProvider):
         except Exception as exc:
             attempts = max(attempt_counter["value"], 1)
             error_msg = f"responses endpoint error after {attempts} attempt{'s' if attempts > 1 else ''}: {exc}"
-            logging.error(error_msg)
+            logger.error(error_msg)
             raise RuntimeError(error_msg) from exc
 
     def generate_content(
@@ -918,23 +1287,31 @@ class OpenAICompatibleProvider(ModelProvider):
         Returns:
             ModelResponse with generated content and metadata
         """
-        # Validate model name against allow-list
-        if not self.validate_model_name(model_name):
-            raise ValueError(f"Model '{model_name}' not in allowed models list. Allowed models: {self.allowed_models}")
-
+        # A successful capability lookup already implies the model passed the allow-list, so the
+        # separate validate_model_name pass is only needed when the lookup fails.
         capabilities: Optional[ModelCapabilities]
         try:
             capabilities = self.get_capabilities(model_name)
         except Exception as exc:
-            logging.debug(f"Falling back to generic capabilities for {model_name}: {exc}")
             capabilities = None
+            lookup_error = exc
+        else:
+            lookup_error = None
+
+        # Validate model name against allow-list
+        if capabilities is None:
+            if not self.validate_model_name(model_name):
+                raise ValueError(
+                    f"Model '{model_name}' not in allowed models list. Allowed models: {self.allowed_models}"
+                )
+            logger.debug("Falling back to generic capabilities for %s: %s", model_name, lookup_error)
 
         # Get effective temperature for this model from capabilities when available
         if capabilities:
             effective_temperature = capabilities.get_effective_temperature(temperature)
             if effective_temperature is not None and effective_temperature != temperature:
-                logging.debug(
-                    f"Adjusting temperature from {temperature} to {effective_temperature} for model {model_name}"
+                logger.debug(
+                    "Adjusting temperature from %s to %s for model %s", temperature, effective_temperature, model_name
                 )
         else:
             effective_temperature = temperature
@@ -953,30 +1330,20 @@ class OpenAICompatibleProvider(ModelProvider):
             messages.append({"role": "system", "content": system_prompt})
 
         # Prepare user message with text and potentially images
-        user_content = []
-        user_content.append({"type": "text", "text": prompt})
-
-        # Add images if provided and model supports vision
-        if images and capabilities and capabilities.supports_images:
-            for image_path in images:
-                try:
-                    image_content = self._process_image(image_path)
-                    if image_content:
-                        user_content.append(image_content)
-                except Exception as e:
-                    logging.warning(f"Failed to process image {image_path}: {e}")
-                    # Continue with other images and text
-                    continue
-        elif images and (not capabilities or not capabilities.supports_images):
-            logging.warning(f"Model {resolved_model} does not support images, ignoring {len(images)} image(s)")
-
-        # Add user message
-        if len(user_content) == 1:
+        if not images:
             # Only text content, use simple string format for compatibility
             messages.append({"role": "user", "content": prompt})
         else:
-            # Text + images, use content array format
-            messages.append({"role": "user", "content": user_content})
+            user_content = [{"type": "text", "text": prompt}]
+
+            # Add images if provided and model supports vision
+            if capabilities and capabilities.supports_images:
+                user_content.extend(self._process_images(images))
+            else:
+                logger.warning("Model %s does not support images, ignoring %d image(s)", resolved_model, len(images))
+
+            # Text + images use the content array format; fall back to plain text if none survived
+            messages.append({"role": "user", "content": user_content if len(user_content) > 1 else prompt})
 
         # Prepare completion parameters
         completion_params = {
@@ -998,11 +1365,12 @@ class OpenAICompatibleProvider(ModelProvider):
         # Add any additional OpenAI-specific parameters
         # Use capabilities to filter parameters for reasoning models
         for key, value in kwargs.items():
-            if key in ["top_p", "frequency_penalty", "presence_penalty", "seed", "stop", "stream"]:
-                # Reasoning models (those that don't support temperature) also don't support these parameters
-                if not supports_sampling and key in ["top_p", "frequency_penalty", "presence_penalty", "stream"]:
-                    continue  # Skip unsupported parameters for reasoning models
-                completion_params[key] = value
+            if key not in _PASSTHROUGH_KWARGS:
+                continue
+            # Reasoning models (those that don't support temperature) also don't support these parameters
+            if not supports_sampling and key in _SAMPLING_ONLY_KWARGS:
+                continue  # Skip unsupported parameters for reasoning models
+            completion_params[key] = value
 
         # Check if this model needs the Responses API endpoint
         # Prefer capability metadata; fall back to static map when capabilities unavailable
@@ -1026,6 +1394,14 @@ class OpenAICompatibleProvider(ModelProvider):
                 **kwargs,
             )
 
+        provider_type = self.get_provider_type()
+        friendly_name = self.FRIENDLY_NAME
+
+        # OpenRouter calls are streamed so its keep-alive comments can be watched for first activity
+        use_openrouter_streaming = provider_type == ProviderType.OPENROUTER and bool(self.base_url)
+        if use_openrouter_streaming:
+            completion_params["stream"] = True
+
         # Retry logic with progressive delays
         max_retries = 4  # Total of 4 attempts
         retry_delays = [1, 3, 5, 8]  # Progressive delays: 1s, 3s, 5s, 8s
@@ -1034,8 +1410,7 @@ class OpenAICompatibleProvider(ModelProvider):
         def _attempt() -> ModelResponse:
             attempt_counter["value"] += 1
 
-            if self.get_provider_type() == ProviderType.OPENROUTER and self.base_url:
-                completion_params["stream"] = True
+            if use_openrouter_streaming:
                 return self._generate_openrouter_chat_completions_streaming(
                     completion_params=completion_params,
                     model_name=resolved_model,
@@ -1050,8 +1425,8 @@ class OpenAICompatibleProvider(ModelProvider):
                 content=content,
                 usage=usage,
                 model_name=resolved_model,
-                friendly_name=self.FRIENDLY_NAME,
-                provider=self.get_provider_type(),
+                friendly_name=friendly_name,
+                provider=provider_type,
                 metadata={
                     "finish_reason": response.choices[0].finish_reason,
                     "model": response.model,
@@ -1065,15 +1440,15 @@ class OpenAICompatibleProvider(ModelProvider):
                 operation=_attempt,
                 max_attempts=max_retries,
                 delays=retry_delays,
-                log_prefix=f"{self.FRIENDLY_NAME} API ({resolved_model})",
+                log_prefix=f"{friendly_name} API ({resolved_model})",
             )
         except Exception as exc:
             attempts = max(attempt_counter["value"], 1)
             error_msg = (
-                f"{self.FRIENDLY_NAME} API error for model {resolved_model} after {attempts} attempt"
+                f"{friendly_name} API error for model {resolved_model} after {attempts} attempt"
                 f"{'s' if attempts > 1 else ''}: {exc}"
             )
-            logging.error(error_msg)
+            logger.error(error_msg)
             raise RuntimeError(error_msg) from exc
 
     def validate_parameters(self, model_name: str, temperature: float, **kwargs) -> None:
@@ -1091,8 +1466,8 @@ class OpenAICompatibleProvider(ModelProvider):
 
             # Check if we're using generic capabilities
             if hasattr(capabilities, "_is_generic"):
-                logging.debug(
-                    f"Using generic parameter validation for {model_name}. Actual model constraints may differ."
+                logger.debug(
+                    "Using generic parameter validation for %s. Actual model constraints may differ.", model_name
                 )
 
             # Validate temperature using parent class method
@@ -1101,7 +1476,7 @@ class OpenAICompatibleProvider(ModelProvider):
         except Exception as e:
             # For proxy providers, we might not have accurate capabilities
             # Log warning but don't fail
-            logging.warning(f"Parameter validation limited for {model_name}: {e}")
+            logger.warning("Parameter validation limited for %s: %s", model_name, e)
 
     def _extract_usage(self, response) -> dict[str, int]:
         """Extract token usage from OpenAI response.
@@ -1112,15 +1487,28 @@ class OpenAICompatibleProvider(ModelProvider):
         Returns:
             Dictionary with usage statistics
         """
-        usage = {}
+        try:
+            usage = response.usage
+        except AttributeError:
+            return {}
 
-        if hasattr(response, "usage") and response.usage:
-            # Safely extract token counts with None handling
-            usage["input_tokens"] = getattr(response.usage, "prompt_tokens", 0) or 0
-            usage["output_tokens"] = getattr(response.usage, "completion_tokens", 0) or 0
-            usage["total_tokens"] = getattr(response.usage, "total_tokens", 0) or 0
+        if not usage:
+            return {}
 
-        return usage
+        # SDK usage objects always carry all three fields, so read them directly and
+        # only fall back to defaulted lookups for partial (non-SDK) usage objects.
+        try:
+            return {
+                "input_tokens": usage.prompt_tokens or 0,
+                "output_tokens": usage.completion_tokens or 0,
+                "total_tokens": usage.total_tokens or 0,
+            }
+        except AttributeError:
+            return {
+                "input_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                "output_tokens": getattr(usage, "completion_tokens", 0) or 0,
+                "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+            }
 
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens using OpenAI-compatible tokenizer tables when available."""
@@ -1128,17 +1516,11 @@ class OpenAICompatibleProvider(ModelProvider):
         resolved_model = self._resolve_model_name(model_name)
 
         try:
-            import tiktoken
-
-            try:
-                encoding = tiktoken.encoding_for_model(resolved_model)
-            except KeyError:
-                encoding = tiktoken.get_encoding("cl100k_base")
-
-            return len(encoding.encode(text))
-
-        except (ImportError, Exception) as exc:
-            logging.debug("tiktoken unavailable for %s: %s", resolved_model, exc)
+            encoding = _tiktoken_encoding(resolved_model)
+            if encoding is not None:
+                return len(encoding.encode(text))
+        except Exception as exc:
+            logger.debug("tiktoken unavailable for %s: %s", resolved_model, exc)
 
         return super().count_tokens(text, model_name)
 
@@ -1153,10 +1535,23 @@ class OpenAICompatibleProvider(ModelProvider):
         Returns:
             True if error should be retried, False otherwise
         """
-        error_str = str(error).lower()
+        # OpenAI SDK status errors carry the HTTP status and the parsed error body's
+        # type/code, so the common case needs no string parsing at all.
+        status_code = getattr(error, "status_code", None)
+        if not isinstance(status_code, int):
+            status_code = None
+        if status_code == 429:
+            error_type = getattr(error, "type", None)
+            error_code = getattr(error, "code", None)
+            if error_type is not None or error_code is not None:
+                return self._is_rate_limit_retryable(error_type, error_code)
+
+        # Stringify once: the original casing feeds the payload parse, the lowercase copy the indicator checks.
+        raw_error = str(error)
+        error_str = raw_error.lower()
 
         # Check for 429 errors first - these need special handling
-        if "429" in error_str:
+        if status_code == 429 or (status_code is None and "429" in error_str):
             # Try to extract structured error information
             error_type = None
             error_code = None
@@ -1165,12 +1560,10 @@ class OpenAICompatibleProvider(ModelProvider):
             # Format: "Error code: 429 - {'error': {'type': 'tokens', 'code': 'rate_limit_exceeded', ...}}"
             try:
                 import ast
-                import json
-                import re
 
                 # Extract JSON part from error string using regex
                 # Look for pattern: {...} (from first { to last })
-                json_match = re.search(r"\{.*\}", str(error))
+                json_match = _ERROR_JSON_RE.search(raw_error)
                 if json_match:
                     json_like_str = json_match.group(0)
 
@@ -1200,38 +1593,49 @@ class OpenAICompatibleProvider(ModelProvider):
                     except Exception:
                         pass
 
-            # Determine if 429 is retryable based on structured error codes
-            if error_type == "tokens":
-                # Token-related 429s are typically non-retryable (request too large)
-                logging.debug(f"Non-retryable 429: token-related error (type={error_type}, code={error_code})")
-                return False
-            elif error_code in ["invalid_request_error", "context_length_exceeded"]:
-                # These are permanent failures
-                logging.debug(f"Non-retryable 429: permanent failure (type={error_type}, code={error_code})")
-                return False
-            else:
-                # Other 429s (like requests per minute) are retryable
-                logging.debug(f"Retryable 429: rate limiting (type={error_type}, code={error_code})")
-                return True
+            return self._is_rate_limit_retryable(error_type, error_code)
 
         # For non-429 errors, check if they're retryable
-        retryable_indicators = [
-            "timeout",
-            "connection",
-            "network",
-            "temporary",
-            "unavailable",
-            "retry",
-            "408",  # Request timeout
-            "500",  # Internal server error
-            "502",  # Bad gateway
-            "503",  # Service unavailable
-            "504",  # Gateway timeout
-            "ssl",  # SSL errors
-            "handshake",  # Handshake failures
-        ]
+        return _RETRYABLE_ERROR_RE.search(error_str) is not None
+
+    @staticmethod
+    def _is_rate_limit_retryable(error_type: Optional[str], error_code: Optional[str]) -> bool:
+        """Decide whether a 429 is retryable from its structured error type/code."""
+
+        if error_type == "tokens":
+            # Token-related 429s are typically non-retryable (request too large)
+            logger.debug("Non-retryable 429: token-related error (type=%s, code=%s)", error_type, error_code)
+            return False
+        elif error_code in ["invalid_request_error", "context_length_exceeded"]:
+            # These are permanent failures
+            logger.debug("Non-retryable 429: permanent failure (type=%s, code=%s)", error_type, error_code)
+            return False
+        else:
+            # Other 429s (like requests per minute) are retryable
+            logger.debug("Retryable 429: rate limiting (type=%s, code=%s)", error_type, error_code)
+            return True
 
-        return any(indicator in error_str for indicator in retryable_indicators)
+    def _process_images(self, image_paths: list[str]) -> list[dict]:
+        """Process several images concurrently, keeping input order and dropping failures.
+
+        Reading and validating each file is independent I/O, so a small thread pool
+        overlaps it instead of paying the latency of every image in sequence.
+        """
+
+        def _process(image_path: str) -> Optional[dict]:
+            try:
+                return self._process_image(image_path)
+            except Exception as e:
+                logger.warning("Failed to process image %s: %s", image_path, e)
+                # Continue with other images and text
+                return None
+
+        if len(image_paths) == 1:
+            results = [_process(image_paths[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(8, len(image_paths))) as pool:
+                results = list(pool.map(_process, image_paths))
+        return [result for result in results if result]
 
     def _process_image(self, image_path: str) -> Optional[dict]:
         """Process an image for OpenAI-compatible API."""
@@ -1244,21 +1648,14 @@ class OpenAICompatibleProvider(ModelProvider):
             else:
                 # Use base class validation
                 image_bytes, mime_type = validate_image(image_path)
-
-                # Read and encode the image
-                import base64
-
-                image_data = base64.b64encode(image_bytes).decode()
-                logging.debug(f"Processing image '{image_path}' as MIME type '{mime_type}'")
+                logger.debug("Processing image '%s' as MIME type '%s'", image_path, mime_type)
 
                 # Create data URL for OpenAI API
-                data_url = f"data:{mime_type};base64,{image_data}"
-
-                return {"type": "image_url", "image_url": {"url": data_url}}
+                return {"type": "image_url", "image_url": {"url": build_image_data_url(image_bytes, mime_type)}}
 
         except ValueError as e:
-            logging.warning(str(e))
+            logger.warning(str(e))
             return None
         except Exception as e:
-            logging.error(f"Error processing image {image_path}: {e}")
+            logger.error("Error processing image %s: %s", image_path, e)
             return None
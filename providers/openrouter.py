@@ -1,10 +1,17 @@
 """OpenRouter provider implementation."""
 
+import atexit
+import hashlib
 import logging
 import threading
 import time
+from collections import OrderedDict
+from contextlib import suppress
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Any
 
+from utils import model_restrictions
 from utils.env import get_env
 
 import httpx
@@ -17,6 +24,35 @@ from .shared import (
     RangeTemperatureConstraint,
 )
 
+# Read once at import and kept read-only so no provider can mutate the shared
+# mapping; empty environment values fall back to the defaults.
+_DEFAULT_HEADERS = MappingProxyType(
+    {
+        "HTTP-Referer": get_env("OPENROUTER_REFERER")
+        or "https://github.com/Shelpuk-AI-Technology-Consulting/pally-mcp-server",
+        "X-Title": get_env("OPENROUTER_TITLE") or "PAL MCP Server",
+    }
+)
+
+
+@lru_cache(maxsize=128)
+def _derive_models_api_flags(
+    supported_parameters: tuple[str, ...], input_modalities: tuple[str, ...]
+) -> tuple[bool, bool, bool, bool]:
+    """Return (images, function calling, JSON mode, temperature) support for a Models API entry.
+
+    Catalogue entries repeat a small number of parameter/modality combinations, so
+    the flags are cached per combination.
+    """
+
+    supported = frozenset(supported_parameters)
+    return (
+        "image" in input_modalities,
+        "tools" in supported,
+        "response_format" in supported or "structured_outputs" in supported,
+        "temperature" in supported,
+    )
+
 
 class OpenRouterProvider(OpenAICompatibleProvider):
     """Client for OpenRouter's multi-model aggregation service.
@@ -39,25 +75,27 @@ class OpenRouterProvider(OpenAICompatibleProvider):
     FRIENDLY_NAME = "OpenRouter"
 
     # Custom headers required by OpenRouter
-    DEFAULT_HEADERS = {
-        "HTTP-Referer": get_env(
-            "OPENROUTER_REFERER", "https://github.com/Shelpuk-AI-Technology-Consulting/pally-mcp-server"
-        )
-        or "https://github.com/Shelpuk-AI-Technology-Consulting/pally-mcp-server",
-        "X-Title": get_env("OPENROUTER_TITLE", "PAL MCP Server") or "PAL MCP Server",
-    }
+    DEFAULT_HEADERS = _DEFAULT_HEADERS
 
     # Model registry for managing configurations and aliases
     _registry: OpenRouterModelRegistry | None = None
     _models_api_lock = threading.Lock()
-    _models_api_cache: dict[str, dict[str, Any]] | None = None
-    _models_api_last_fetch: float | None = None
-    _models_api_last_failure: float | None = None
+    # Models API state is keyed by a digest of the API key so providers built with
+    # different keys never serve each other's catalogue.
+    _models_api_cache: dict[str, tuple[float, dict[str, dict[str, Any]]]] = {}  # key -> (fetched at, index)
+    _models_api_last_failure: dict[str, float] = {}
+    _models_api_generation = 0
+    _models_api_inflight: dict[str, threading.Event] = {}
+    _models_api_http_client: httpx.Client | None = None
+    _models_api_http_client_lock = threading.Lock()
 
     _MODELS_API_URL = "https://openrouter.ai/api/v1/models"
     _MODELS_API_TTL_SEC = 60 * 60 * 24  # daily refresh
     _MODELS_API_TIMEOUT_SEC = 5.0
     _MODELS_API_FAILURE_COOLDOWN_SEC = 60.0
+    _MODELS_API_INFLIGHT_WAIT_SEC = 15.0
+    _NEGATIVE_LOOKUP_TTL_SEC = 300.0
+    _NEGATIVE_LOOKUP_MAX = 512
 
     def __init__(self, api_key: str, **kwargs):
         """Initialize OpenRouter provider.
@@ -68,7 +106,15 @@ class OpenRouterProvider(OpenAICompatibleProvider):
         """
         base_url = "https://openrouter.ai/api/v1"
         self._alias_cache: dict[str, str] = {}
+        self._capabilities_cache: dict[str, ModelCapabilities | None] = {}
+        self._capabilities_cache_generation = 0
+        self._negative_lookups: OrderedDict[str, tuple[float, ModelCapabilities]] = OrderedDict()
+        self._registry_snapshot: dict[str, ModelCapabilities] | None = None
+        self._registry_snapshot_source: OpenRouterModelRegistry | None = None
         super().__init__(api_key, base_url=base_url, **kwargs)
+        # Providers are rebuilt when the key rotates, so the headers can be fixed here.
+        self._models_api_headers = {"Authorization": f"Bearer {self.api_key}", **self.DEFAULT_HEADERS}
+        self._models_api_key = hashlib.blake2b((self.api_key or "").encode(), digest_size=8).hexdigest()
 
         # Initialize model registry
         if OpenRouterProvider._registry is None:
@@ -78,56 +124,124 @@ class OpenRouterProvider(OpenAICompatibleProvider):
             aliases = self._registry.list_aliases()
             logging.info(f"OpenRouter loaded {len(models)} models with {len(aliases)} aliases")
 
+    @classmethod
+    def _get_models_api_http_client(cls) -> httpx.Client:
+        """Return the process-wide client used for Models API refreshes.
+
+        Keeping one pooled client alive lets retries after a failure cooldown reuse
+        the open TLS connection instead of paying a fresh handshake each time.
+        """
+
+        client = cls._models_api_http_client
+        if client is None:
+            with cls._models_api_http_client_lock:
+                client = cls._models_api_http_client
+                if client is None:
+                    client = httpx.Client(
+                        timeout=cls._MODELS_API_TIMEOUT_SEC,
+                        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                    )
+                    atexit.register(client.close)
+                    OpenRouterProvider._models_api_http_client = client
+        return client
+
     def _fetch_models_api(self) -> list[dict[str, Any]]:
-        headers = {"Authorization": f"Bearer {self.api_key}", **self.DEFAULT_HEADERS}
-        with httpx.Client(timeout=self._MODELS_API_TIMEOUT_SEC) as client:
-            response = client.get(self._MODELS_API_URL, headers=headers)
-            response.raise_for_status()
-            payload = response.json()
+        headers = self._models_api_headers
+        test_transport = getattr(self, "_test_transport", None)
+        if test_transport is not None:
+            with httpx.Client(transport=test_transport, timeout=self._MODELS_API_TIMEOUT_SEC) as client:
+                response = client.get(self._MODELS_API_URL, headers=headers)
+        else:
+            response = self._get_models_api_http_client().get(self._MODELS_API_URL, headers=headers)
+        response.raise_for_status()
+        payload = response.json()
         data = payload.get("data", [])
         return data if isinstance(data, list) else []
 
     def _get_models_api_cache(self) -> dict[str, dict[str, Any]]:
+        """Return the Models API index, raising when it is unavailable."""
+
+        index = self._try_get_models_api_cache()
+        if index is None:
+            raise RuntimeError("OpenRouter models API unavailable (fetch failed or cooldown active)")
+        return index
+
+    def _try_get_models_api_cache(self) -> dict[str, dict[str, Any]] | None:
+        """Return the Models API index, or ``None`` while the API is failing or cooling down."""
+
         now = time.time()
+        key = self._models_api_key
 
-        with self._models_api_lock:
-            cache = self._models_api_cache
-            last_fetch = self._models_api_last_fetch
+        # Fast path: a fresh cache can be returned without taking the lock.
+        entry = self._models_api_cache.get(key)
+        if entry is not None and (now - entry[0]) < self._MODELS_API_TTL_SEC:
+            return entry[1]
 
-            if cache is not None and last_fetch is not None and (now - last_fetch) < self._MODELS_API_TTL_SEC:
-                return cache
+        with self._models_api_lock:
+            entry = self._models_api_cache.get(key)
+            if entry is not None and (now - entry[0]) < self._MODELS_API_TTL_SEC:
+                return entry[1]
 
-            last_failure = self._models_api_last_failure
+            last_failure = self._models_api_last_failure.get(key)
             if last_failure is not None and (now - last_failure) < self._MODELS_API_FAILURE_COOLDOWN_SEC:
-                raise RuntimeError("OpenRouter models API recently failed; cooldown active")
-
-            try:
-                models = self._fetch_models_api()
-                index: dict[str, dict[str, Any]] = {}
-                for model in models:
-                    if not isinstance(model, dict):
-                        continue
-                    model_id = model.get("id")
-                    if isinstance(model_id, str) and model_id:
-                        index[model_id] = model
-
-                    canonical_slug = model.get("canonical_slug")
-                    if isinstance(canonical_slug, str) and canonical_slug and canonical_slug not in index:
-                        index[canonical_slug] = model
-
-                self._models_api_cache = index
-                self._models_api_last_fetch = now
-                self._models_api_last_failure = None
-                return index
-            except Exception as exc:
-                self._models_api_last_failure = now
-                raise RuntimeError(f"Failed to fetch OpenRouter models API: {exc}") from exc
+                logging.debug("OpenRouter models API recently failed; cooldown active")
+                return None
+
+            # Single-flight: the first caller fetches without holding the lock while
+            # concurrent callers wait for its result instead of queueing up refreshes.
+            inflight = self._models_api_inflight.get(key)
+            is_leader = inflight is None
+            if is_leader:
+                inflight = self._models_api_inflight[key] = threading.Event()
+
+        if not is_leader:
+            inflight.wait(self._MODELS_API_INFLIGHT_WAIT_SEC)
+            entry = self._models_api_cache.get(key)
+            if entry is not None and (now - entry[0]) < self._MODELS_API_TTL_SEC:
+                return entry[1]
+            logging.debug("OpenRouter models API refresh by another caller did not complete")
+            return None
 
-    def _lookup_dynamic_model_info(self, model_name: str) -> dict[str, Any] | None:
+        index: dict[str, dict[str, Any]] | None = None
         try:
-            index = self._get_models_api_cache()
+            index = self._build_models_api_index(self._fetch_models_api())
+            return index
         except Exception as exc:
-            logging.debug("OpenRouter models API unavailable: %s", exc)
+            logging.debug("Failed to fetch OpenRouter models API: %s", exc)
+            return None
+        finally:
+            with self._models_api_lock:
+                if index is not None:
+                    OpenRouterProvider._models_api_generation += 1
+                    self._models_api_cache[key] = (now, index)
+                    self._models_api_last_failure.pop(key, None)
+                else:
+                    self._models_api_last_failure[key] = now
+                self._models_api_inflight.pop(key, None)
+            inflight.set()
+
+    @staticmethod
+    def _build_models_api_index(models: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        """Index Models API entries by id, falling back to their canonical slug."""
+
+        # The payload comes straight from JSON decoding, so exact type checks are enough.
+        index: dict[str, dict[str, Any]] = {}
+        setdefault = index.setdefault
+        for model in models:
+            if type(model) is not dict:
+                continue
+            model_id = model.get("id")
+            if type(model_id) is str and model_id:
+                index[model_id] = model
+
+            canonical_slug = model.get("canonical_slug")
+            if type(canonical_slug) is str and canonical_slug:
+                setdefault(canonical_slug, model)
+        return index
+
+    def _lookup_dynamic_model_info(self, model_name: str) -> dict[str, Any] | None:
+        index = self._try_get_models_api_cache()
+        if index is None:
             return None
 
         hit = index.get(model_name)
@@ -143,7 +257,9 @@ class OpenRouterProvider(OpenAICompatibleProvider):
     def _build_capabilities_from_models_api(self, model_name: str, model_info: dict[str, Any]) -> ModelCapabilities:
         context_window = int(model_info.get("context_length") or 0) or 32_768
 
-        top_provider = model_info.get("top_provider") or {}
+        # Missing or null sections fail the isinstance checks below, so no empty
+        # placeholder containers are allocated for them.
+        top_provider = model_info.get("top_provider")
         max_completion_tokens = None
         if isinstance(top_provider, dict):
             max_completion_tokens = top_provider.get("max_completion_tokens")
@@ -152,22 +268,21 @@ class OpenRouterProvider(OpenAICompatibleProvider):
         else:
             max_output_tokens = min(context_window, 32_768)
 
-        architecture = model_info.get("architecture") or {}
-        input_modalities: list[str] = []
+        architecture = model_info.get("architecture")
+        input_modalities: tuple[str, ...] = ()
         if isinstance(architecture, dict):
-            raw_modalities = architecture.get("input_modalities") or []
+            raw_modalities = architecture.get("input_modalities")
             if isinstance(raw_modalities, list):
-                input_modalities = [m for m in raw_modalities if isinstance(m, str)]
+                input_modalities = tuple(m for m in raw_modalities if isinstance(m, str))
 
-        supported_parameters: list[str] = []
-        raw_supported = model_info.get("supported_parameters") or []
+        supported_parameters: tuple[str, ...] = ()
+        raw_supported = model_info.get("supported_parameters")
         if isinstance(raw_supported, list):
-            supported_parameters = [p for p in raw_supported if isinstance(p, str)]
+            supported_parameters = tuple(p for p in raw_supported if isinstance(p, str))
 
-        supports_images = "image" in input_modalities
-        supports_function_calling = "tools" in supported_parameters
-        supports_json_mode = "response_format" in supported_parameters or "structured_outputs" in supported_parameters
-        supports_temperature = "temperature" in supported_parameters
+        supports_images, supports_function_calling, supports_json_mode, supports_temperature = _derive_models_api_flags(
+            supported_parameters, input_modalities
+        )
 
         description = model_info.get("description") or model_info.get("name") or ""
         if not isinstance(description, str):
@@ -206,16 +321,30 @@ class OpenRouterProvider(OpenAICompatibleProvider):
     ) -> ModelCapabilities | None:
         """Fetch OpenRouter capabilities from the registry or build a generic fallback."""
 
+        # Registry entries are static and Models API entries only change on refresh,
+        # so resolved capabilities are memoised per Models API generation.
+        memo = self._get_capabilities_memo()
+        if canonical_name in memo:
+            return memo[canonical_name]
+
         capabilities = self._registry.get_capabilities(canonical_name)
         if capabilities:
+            memo[canonical_name] = capabilities
             return capabilities
 
         base_identifier = canonical_name.rsplit(":", 1)[0]
         if "/" in base_identifier:
+            negative = self._negative_lookups.get(canonical_name)
+            if negative is not None and time.monotonic() < negative[0]:
+                return negative[1]
+
             model_info = self._lookup_dynamic_model_info(canonical_name)
             if model_info is not None:
                 logging.debug("Loaded OpenRouter capabilities for %s from Models API", canonical_name)
-                return self._build_capabilities_from_models_api(canonical_name, model_info)
+                capabilities = self._build_capabilities_from_models_api(canonical_name, model_info)
+                # Re-read the memo: the lookup above may have refreshed the Models API cache.
+                self._get_capabilities_memo()[canonical_name] = capabilities
+                return capabilities
 
             logging.debug(
                 "Using generic OpenRouter capabilities for %s (provider/model format detected)", canonical_name
@@ -235,14 +364,40 @@ class OpenRouterProvider(OpenAICompatibleProvider):
                 temperature_constraint=RangeTemperatureConstraint(0.0, 2.0, 1.0),
             )
             generic._is_generic = True
+            # Only remember the miss when the Models API answered; after an outage the
+            # model may still resolve once the API is reachable again.
+            if self._models_api_key not in self._models_api_last_failure:
+                self._remember_negative_lookup(canonical_name, generic)
             return generic
 
         logging.debug(
             "Rejecting unknown OpenRouter model '%s' (no provider prefix); requires explicit configuration",
             canonical_name,
         )
+        memo[canonical_name] = None
         return None
 
+    def _get_capabilities_memo(self) -> dict[str, ModelCapabilities | None]:
+        """Return the capability memo, dropping it if the Models API cache has been refreshed."""
+
+        generation = OpenRouterProvider._models_api_generation
+        if self._capabilities_cache_generation != generation:
+            self._capabilities_cache = {}
+            self._negative_lookups = OrderedDict()
+            self._capabilities_cache_generation = generation
+        return self._capabilities_cache
+
+    def _remember_negative_lookup(self, model_name: str, capabilities: ModelCapabilities) -> None:
+        """Cache a Models API miss for a bounded time so repeated lookups skip the probe."""
+
+        self._get_capabilities_memo()  # the miss may have come from a refresh that just bumped the generation
+        lookups = self._negative_lookups
+        lookups[model_name] = (time.monotonic() + self._NEGATIVE_LOOKUP_TTL_SEC, capabilities)
+        lookups.move_to_end(model_name)
+        if len(lookups) > self._NEGATIVE_LOOKUP_MAX:
+            with suppress(KeyError):
+                lookups.popitem(last=False)
+
     # ------------------------------------------------------------------
     # Provider identity
     # ------------------------------------------------------------------
@@ -268,28 +423,31 @@ class OpenRouterProvider(OpenAICompatibleProvider):
         if not self._registry:
             return []
 
-        from utils.model_restrictions import get_restriction_service
-
-        restriction_service = get_restriction_service() if respect_restrictions else None
+        restriction_service = model_restrictions.get_restriction_service() if respect_restrictions else None
+        provider_type = self.get_provider_type()
         allowed_configs: dict[str, ModelCapabilities] = {}
 
-        for model_name in self._registry.list_models():
-            config = self._registry.resolve(model_name)
-            if not config:
-                continue
-
-            # Custom models belong to CustomProvider; skip them here so the two
-            # providers don't race over the same registrations (important for tests
-            # that stub the registry with minimal objects lacking attrs).
-            if config.provider == ProviderType.CUSTOM:
-                continue
-
+        # Read the allow-set once: no (or an empty) set means everything is allowed, and
+        # direct canonical hits skip is_allowed. Other names still go through is_allowed,
+        # whose alias resolution also records resolved canonical names in the allow-set.
+        allowed_names = None
+        if restriction_service:
+            allowed_names = restriction_service.get_allowed_models(provider_type)
+            if allowed_names is None or (isinstance(allowed_names, (set, frozenset)) and not allowed_names):
+                restriction_service = None
+            elif not isinstance(allowed_names, (set, frozenset)):
+                allowed_names = None
+
+        for model_name, config in self._get_registry_snapshot().items():
             if restriction_service:
-                allowed = restriction_service.is_allowed(self.get_provider_type(), model_name)
+                allowed = allowed_names is not None and model_name.lower() in allowed_names
+
+                if not allowed:
+                    allowed = restriction_service.is_allowed(provider_type, model_name)
 
                 if not allowed and config.aliases:
                     for alias in config.aliases:
-                        if restriction_service.is_allowed(self.get_provider_type(), alias):
+                        if restriction_service.is_allowed(provider_type, alias):
                             allowed = True
                             break
 
@@ -320,19 +478,20 @@ class OpenRouterProvider(OpenAICompatibleProvider):
         """Resolve aliases defined in the OpenRouter registry."""
 
         cache_key = model_name.lower()
-        if cache_key in self._alias_cache:
-            return self._alias_cache[cache_key]
+        cached = self._alias_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
         config = self._registry.resolve(model_name)
         if config:
-            if config.model_name != model_name:
-                logging.debug("Resolved model alias '%s' to '%s'", model_name, config.model_name)
             resolved = config.model_name
             self._alias_cache[cache_key] = resolved
-            self._alias_cache.setdefault(resolved.lower(), resolved)
+            if resolved != model_name:
+                logging.debug("Resolved model alias '%s' to '%s'", model_name, resolved)
+                self._alias_cache.setdefault(resolved.lower(), resolved)
             return resolved
 
-        logging.debug(f"Model '{model_name}' not found in registry, using as-is")
+        logging.debug("Model '%s' not found in registry, using as-is", model_name)
         self._alias_cache[cache_key] = model_name
         return model_name
 
@@ -342,15 +501,33 @@ class OpenRouterProvider(OpenAICompatibleProvider):
         if not self._registry:
             return {}
 
-        capabilities: dict[str, ModelCapabilities] = {}
-        for model_name in self._registry.list_models():
-            config = self._registry.resolve(model_name)
-            if not config:
-                continue
+        return dict(self._get_registry_snapshot())
 
-            # See note in list_models: respect the CustomProvider boundary.
-            if config.provider == ProviderType.CUSTOM:
-                continue
+    def _get_registry_snapshot(self) -> dict[str, ModelCapabilities]:
+        """Return resolved non-custom registry configs, built once per registry instance."""
 
-            capabilities[model_name] = config
-        return capabilities
+        registry = self._registry
+        if self._registry_snapshot is None or self._registry_snapshot_source is not registry:
+            snapshot: dict[str, ModelCapabilities] = {}
+            for model_name in registry.list_models():
+                config = registry.resolve(model_name)
+                if not config:
+                    continue
+
+                # Custom models belong to CustomProvider; skip them here so the two
+                # providers don't race over the same registrations (important for tests
+                # that stub the registry with minimal objects lacking attrs).
+                if config.provider == ProviderType.CUSTOM:
+                    continue
+
+                snapshot[model_name] = config
+
+            self._registry_snapshot = snapshot
+            self._registry_snapshot_source = registry
+        return self._registry_snapshot
+
+    def _invalidate_capability_cache(self) -> None:
+        """Also drop the registry snapshot so registry changes become visible."""
+
+        super()._invalidate_capability_cache()
+        self._registry_snapshot = None
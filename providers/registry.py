@@ -55,6 +55,8 @@ class ModelProviderRegistry:
             # Initialize instance dictionaries on first creation
             cls._instance._providers = {}
             cls._instance._initialized_providers = {}
+            # model name -> provider type that last accepted it (see get_provider_for_model)
+            cls._instance._model_provider_types = {}
             logging.debug(f"REGISTRY: Created instance {cls._instance}")
         return cls._instance
 
@@ -70,6 +72,7 @@ class ModelProviderRegistry:
         instance._providers[provider_type] = provider_class
         # Invalidate any cached instance so subsequent lookups use the new registration
         instance._initialized_providers.pop(provider_type, None)
+        instance._model_provider_types.clear()
 
     @classmethod
     def get_provider(cls, provider_type: ProviderType, force_new: bool = False) -> Optional[ModelProvider]:
@@ -181,8 +184,18 @@ class ModelProviderRegistry:
         """
         logging.debug(f"get_provider_for_model called with model_name='{model_name}'")
 
-        # Check providers in priority order
         instance = cls()
+
+        # Models repeatedly resolve to the same provider; re-validate the remembered one
+        # before scanning every provider again.
+        cached_type = instance._model_provider_types.get(model_name)
+        if cached_type is not None and cached_type in instance._providers:
+            provider = cls.get_provider(cached_type)
+            if provider and provider.validate_model_name(model_name):
+                return provider
+            instance._model_provider_types.pop(model_name, None)
+
+        # Check providers in priority order
         logging.debug(f"Registry instance: {instance}")
         logging.debug(f"Available providers in registry: {list(instance._providers.keys())}")
 
@@ -193,6 +206,7 @@ class ModelProviderRegistry:
                 provider = cls.get_provider(provider_type)
                 if provider and provider.validate_model_name(model_name):
                     logging.debug(f"{provider_type} validates model {model_name}")
+                    instance._model_provider_types[model_name] = provider_type
                     return provider
                 else:
                     logging.debug(f"{provider_type} does not validate model {model_name}")
@@ -465,6 +479,7 @@ class ModelProviderRegistry:
         """Clear cached provider instances."""
         instance = cls()
         instance._initialized_providers.clear()
+        instance._model_provider_types.clear()
 
     @classmethod
     def reset_for_testing(cls) -> None:
@@ -483,3 +498,4 @@ class ModelProviderRegistry:
         instance = cls()
         instance._providers.pop(provider_type, None)
         instance._initialized_providers.pop(provider_type, None)
+        instance._model_provider_types.clear()
@@ -75,6 +75,27 @@ class TestAliasTargetRestrictions:
         assert provider.validate_model_name("gpt-5-mini")
         assert not provider.validate_model_name("o4-mini")
 
+    @patch.dict(os.environ, {"OPENAI_ALLOWED_MODELS": "mini"})
+    def test_provider_allowlist_resolves_alias_entries_once(self):
+        """Repeated disallowed lookups should not re-resolve allow-list aliases."""
+        import utils.model_restrictions
+
+        utils.model_restrictions._restriction_service = None
+
+        provider = OpenAIModelProvider(api_key="test-key")
+
+        with patch.object(provider, "_resolve_model_name", wraps=provider._resolve_model_name) as resolve:
+            capabilities = provider.get_capabilities("gpt-5-mini")
+            for _ in range(3):
+                try:
+                    provider._ensure_model_allowed(capabilities, "o4-mini", "o4-mini")
+                except ValueError:
+                    pass
+                else:  # pragma: no cover - defensive
+                    raise AssertionError("o4-mini must be rejected")
+
+        assert [call.args for call in resolve.call_args_list].count(("mini",)) == 1
+
     @patch.dict(os.environ, {"OPENAI_ALLOWED_MODELS": "gpt5"})
     def test_restriction_policy_alias_allows_short_name(self):
         """Common aliases like 'gpt5' should allow their canonical forms."""
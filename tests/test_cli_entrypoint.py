@@ -1,10 +1,27 @@
+import asyncio
 import sys
 
+import pytest
+
+
+def test_pally_mcp_server_cli_version_matches_config(capsys, monkeypatch):
+    import cli
+    from config import __version__
+
+    monkeypatch.setattr(sys, "argv", ["pally-mcp-server", "--version"])
+    cli.main()
+
+    captured = capsys.readouterr()
+    assert captured.out.strip() == str(__version__)
+
+
+def test_pally_mcp_server_cli_version_falls_back_to_importing_config(capsys, monkeypatch):
+    import importlib.util
 
-def test_pally_mcp_server_cli_version_prints_version(capsys, monkeypatch):
     import cli
     from config import __version__
 
+    monkeypatch.setattr(importlib.util, "find_spec", lambda _name: None)
     monkeypatch.setattr(sys, "argv", ["pally-mcp-server", "--version"])
     cli.main()
 
@@ -21,7 +38,7 @@ def test_pally_mcp_server_cli_start_subcommand_invokes_asyncio(monkeypatch):
         called["value"] = True
         _coro.close()
 
-    monkeypatch.setattr(cli.asyncio, "run", fake_asyncio_run)
+    monkeypatch.setattr(asyncio, "run", fake_asyncio_run)
     monkeypatch.setattr(sys, "argv", ["pally-mcp-server", "start-mcp-server"])
     cli.main()
 
@@ -37,8 +54,85 @@ def test_pally_mcp_server_cli_no_args_invokes_asyncio(monkeypatch):
         called["value"] = True
         _coro.close()
 
-    monkeypatch.setattr(cli.asyncio, "run", fake_asyncio_run)
+    monkeypatch.setattr(asyncio, "run", fake_asyncio_run)
     monkeypatch.setattr(sys, "argv", ["pally-mcp-server"])
     cli.main()
 
     assert called["value"] is True
+
+
+def test_pally_mcp_server_cli_unknown_argument_exits_with_usage_error(capsys, monkeypatch):
+    import cli
+
+    monkeypatch.setattr(sys, "argv", ["pally-mcp-server", "--bogus"])
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main()
+
+    assert exc_info.value.code == 2
+    assert "unrecognized arguments: --bogus" in capsys.readouterr().err
+
+
+def test_pally_mcp_server_cli_exposes_version_lazily():
+    import cli
+    from config import __version__
+
+    assert cli.__version__ == __version__
+
+
+def test_pally_mcp_server_cli_help_lists_start_command(capsys, monkeypatch):
+    import cli
+
+    monkeypatch.setattr(sys, "argv", ["pally-mcp-server", "--help"])
+    cli.main()
+
+    captured = capsys.readouterr()
+    assert "start-mcp-server" in captured.out
+    assert "--version" in captured.out
+
+
+def test_pally_mcp_server_cli_unknown_command_exits_with_usage_error(capsys, monkeypatch):
+    import cli
+
+    monkeypatch.setattr(sys, "argv", ["pally-mcp-server", "serve"])
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main()
+
+    assert exc_info.value.code == 2
+    assert "unknown command: serve" in capsys.readouterr().err
+
+
+def test_pally_mcp_server_cli_version_does_not_start_server(capsys, monkeypatch):
+    import cli
+
+    def fail_run_server():
+        raise AssertionError("--version must not start the server")
+
+    monkeypatch.setattr(cli, "_run_server", fail_run_server)
+    monkeypatch.setattr(sys, "argv", ["pally-mcp-server", "--version"])
+    cli.main()
+
+    assert capsys.readouterr().out.strip()
+
+
+def test_pally_mcp_server_cli_version_fast_path_imports_nothing_heavy():
+    import subprocess
+    from pathlib import Path
+
+    script = (
+        "import sys\n"
+        "sys.argv = ['pally-mcp-server', '--version']\n"
+        "import cli\n"
+        "cli.main()\n"
+        "print(sorted(m for m in ('argparse', 'asyncio', 'config', 'server') if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    from config import __version__
+
+    assert result.stdout.splitlines() == [str(__version__), "[]"]
@@ -35,6 +35,65 @@ class TestCustomProvider:
             with pytest.raises(ValueError, match="Custom API URL must be provided"):
                 CustomProvider(api_key="test-key")
 
+    def test_timeouts_use_local_profile_with_env_override(self):
+        """Local endpoints get the extended profile; CUSTOM_*_TIMEOUT env vars override it."""
+        with patch.dict(os.environ, {"CUSTOM_READ_TIMEOUT": "42"}):
+            provider = CustomProvider(api_key="test-key", base_url="http://localhost:11434/v1")
+
+        assert provider.timeout_config.connect == 60.0
+        assert provider.timeout_config.read == 42.0
+        assert provider.timeout_config.write == 1800.0
+
+    def test_timeouts_use_custom_remote_profile_with_kwarg_override(self):
+        """Remote custom endpoints get the 15 minute profile; kwargs win over defaults."""
+        provider = CustomProvider(api_key="test-key", base_url="https://llm.example.com/v1", connect_timeout=5.0)
+
+        assert provider.timeout_config.connect == 5.0
+        assert provider.timeout_config.read == 900.0
+
+    def test_http_pool_is_shared_between_instances_for_same_endpoint(self):
+        """Re-created providers reuse the keep-alive pool of earlier instances for the same endpoint."""
+        first = CustomProvider(api_key="key-1", base_url="https://llm.example.com/v1")
+        second = CustomProvider(api_key="key-2", base_url="https://llm.example.com/v1")
+        other = CustomProvider(api_key="key-1", base_url="https://other.example.com/v1")
+
+        assert first.client._client is second.client._client
+        assert first.client._client is not other.client._client
+        assert first.client.api_key == "key-1"
+        assert second.client.api_key == "key-2"
+
+    def test_closing_one_sdk_client_keeps_shared_pool_open(self):
+        """OpenAI.close() on one provider must not close the pool other providers share."""
+        first = CustomProvider(api_key="key-1", base_url="https://pool-close.example.com/v1")
+        second = CustomProvider(api_key="key-2", base_url="https://pool-close.example.com/v1")
+        shared = second.client._client
+
+        first.client.close()
+
+        assert not shared.is_closed
+        assert second.client._client is shared
+
+    def test_client_is_built_once_under_concurrent_access(self):
+        """Concurrent first accesses to the lazy SDK client share a single instance."""
+        import threading
+
+        provider = CustomProvider(api_key="test-key", base_url="https://llm.example.com/v1")
+        clients = []
+        barrier = threading.Barrier(8)
+
+        def access():
+            barrier.wait()
+            clients.append(provider.client)
+
+        threads = [threading.Thread(target=access) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert len(clients) == 8
+        assert all(client is clients[0] for client in clients)
+
     def test_validate_model_names_always_true(self):
         """Test CustomProvider validates model names correctly."""
         provider = CustomProvider(api_key="test-key", base_url="http://localhost:11434/v1")
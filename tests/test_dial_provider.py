@@ -270,3 +270,18 @@ class TestDIALProvider:
 
         # Assert that the deployment clients cache is cleared
         assert not provider._deployment_clients
+
+    def test_deployment_client_builds_base_client_without_deadlock(self):
+        """The deployment client lock and the lazy SDK client lock must not be the same lock."""
+        import threading
+
+        provider = DIALModelProvider(api_key="test-key")
+        result = {}
+
+        worker = threading.Thread(target=lambda: result.setdefault("client", provider._get_deployment_client("gpt-4")))
+        worker.daemon = True
+        worker.start()
+        worker.join(timeout=5)
+
+        assert not worker.is_alive(), "_get_deployment_client deadlocked while building the base client"
+        assert "/deployments/gpt-4" in str(result["client"].base_url)
@@ -7,7 +7,7 @@ from unittest.mock import Mock, patch
 
 import pytest
 
-from utils.image_utils import DEFAULT_MAX_IMAGE_SIZE_MB, validate_image
+from utils.image_utils import DEFAULT_MAX_IMAGE_SIZE_MB, build_image_data_url, validate_image
 
 
 class TestImageValidation:
@@ -233,8 +233,8 @@ class TestProviderIntegration:
         assert result is None
         mock_logger.warning.assert_called_with("Image file not found: /nonexistent/image.png")
 
-    @patch("providers.openai_compatible.logging")
-    def test_openai_compatible_provider_uses_validation(self, mock_logging: Mock) -> None:
+    @patch("providers.openai_compatible.logger")
+    def test_openai_compatible_provider_uses_validation(self, mock_logger: Mock) -> None:
         """Test that OpenAI-compatible providers use the base validation."""
         from providers.xai import XAIModelProvider
 
@@ -244,7 +244,7 @@ class TestProviderIntegration:
         # Test with non-existent file
         result = provider._process_image("/nonexistent/image.png")
         assert result is None
-        mock_logging.warning.assert_called_with("Image file not found: /nonexistent/image.png")
+        mock_logger.warning.assert_called_with("Image file not found: /nonexistent/image.png")
 
     def test_data_url_preservation(self) -> None:
         """Test that data URLs are properly preserved through validation."""
@@ -259,3 +259,40 @@ class TestProviderIntegration:
         assert result is not None
         assert result["type"] == "image_url"
         assert result["image_url"]["url"] == data_url
+
+    def test_file_path_encoded_as_data_url(self) -> None:
+        """File images are embedded as a base64 data URL that round-trips through validation."""
+        from providers.xai import XAIModelProvider
+
+        png_bytes = base64.b64decode(
+            "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+        )
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
+            tmp.write(png_bytes)
+        try:
+            result = XAIModelProvider(api_key="test-key")._process_image(tmp.name)
+        finally:
+            os.unlink(tmp.name)
+
+        expected = "data:image/png;base64," + base64.b64encode(png_bytes).decode()
+        assert build_image_data_url(png_bytes, "image/png") == expected
+        assert result == {"type": "image_url", "image_url": {"url": expected}}
+        assert validate_image(expected) == (png_bytes, "image/png")
+
+    def test_process_images_keeps_order_and_drops_failures(self) -> None:
+        """Concurrent image processing preserves input order and skips images that fail."""
+        from providers.xai import XAIModelProvider
+
+        provider = XAIModelProvider(api_key="test-key")
+
+        def fake_process(path: str):
+            if path == "bad":
+                raise RuntimeError("boom")
+            if path == "missing":
+                return None
+            return {"type": "image_url", "image_url": {"url": path}}
+
+        with patch.object(provider, "_process_image", side_effect=fake_process):
+            result = provider._process_images(["a", "bad", "b", "missing", "c"])
+
+        assert [item["image_url"]["url"] for item in result] == ["a", "b", "c"]
@@ -0,0 +1,45 @@
+"""Tests for OpenAI-compatible request sanitisation before logging."""
+
+import copy
+import unittest
+
+from providers.openrouter import OpenRouterProvider
+
+
+class TestSanitizeForLogging(unittest.TestCase):
+    """_sanitize_for_logging must redact and truncate without mutating the request."""
+
+    def setUp(self):
+        self.provider = OpenRouterProvider(api_key="test-key")
+
+    def test_truncates_long_text_and_leaves_params_untouched(self):
+        long_text = "x" * 150
+        params = {
+            "model": "o3-pro",
+            "api_key": "secret",
+            "authorization": "Bearer secret",
+            "input": [
+                {"role": "user", "content": [{"type": "input_text", "text": long_text}]},
+                {"role": "assistant", "content": [{"type": "output_text", "text": "short"}]},
+            ],
+        }
+        original = copy.deepcopy(params)
+
+        sanitized = self.provider._sanitize_for_logging(params)
+
+        self.assertEqual(params, original)
+        self.assertNotIn("api_key", sanitized)
+        self.assertNotIn("authorization", sanitized)
+        self.assertEqual(sanitized["input"][0]["content"][0]["text"], "x" * 100 + "... [truncated]")
+        self.assertEqual(sanitized["input"][1]["content"][0]["text"], "short")
+
+    def test_unchanged_messages_are_shared(self):
+        message = {"role": "user", "content": [{"type": "input_text", "text": "hi"}]}
+
+        sanitized = self.provider._sanitize_for_logging({"input": [message]})
+
+        self.assertIs(sanitized["input"][0], message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 """Tests for OpenAI-compatible provider token usage extraction."""
 
+import sys
+import types
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
-from providers.openai_compatible import OpenAICompatibleProvider
+from providers.openai_compatible import OpenAICompatibleProvider, _tiktoken_encoding
 
 
 class TestOpenAICompatibleTokenUsage(unittest.TestCase):
@@ -99,6 +101,23 @@ class TestOpenAICompatibleTokenUsage(unittest.TestCase):
         # Should return empty dict
         self.assertEqual(usage, {})
 
+    def test_extract_usage_with_partial_usage_object(self):
+        """Usage objects missing some fields default those counts to 0."""
+        response = Mock()
+        response.usage = Mock(spec=["prompt_tokens"])
+        response.usage.prompt_tokens = 12
+
+        usage = self.provider._extract_usage(response)
+
+        self.assertEqual(usage, {"input_tokens": 12, "output_tokens": 0, "total_tokens": 0})
+
+    def test_extract_usage_with_null_usage(self):
+        """A usage attribute set to None yields an empty dict."""
+        response = Mock()
+        response.usage = None
+
+        self.assertEqual(self.provider._extract_usage(response), {})
+
     def test_extract_usage_with_zero_tokens(self):
         """Test token extraction with zero token counts."""
         response = Mock()
@@ -133,6 +152,20 @@ class TestOpenAICompatibleTokenUsage(unittest.TestCase):
         total = input_tokens + output_tokens
         self.assertEqual(total, 50)
 
+    def test_count_tokens_caches_tiktoken_encoding_per_model(self):
+        """Encodings are resolved once per model and reused for later counts."""
+        encoding = Mock()
+        encoding.encode.side_effect = lambda text: text.split()
+        fake_tiktoken = types.SimpleNamespace(encoding_for_model=Mock(return_value=encoding), get_encoding=Mock())
+
+        _tiktoken_encoding.cache_clear()
+        self.addCleanup(_tiktoken_encoding.cache_clear)
+        with patch.dict(sys.modules, {"tiktoken": fake_tiktoken}):
+            self.assertEqual(self.provider.count_tokens("one two three", "test-model"), 3)
+            self.assertEqual(self.provider.count_tokens("four five", "test-model"), 2)
+
+        fake_tiktoken.encoding_for_model.assert_called_once_with("test-model")
+
 
 if __name__ == "__main__":
     unittest.main()
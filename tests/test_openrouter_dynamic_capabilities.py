@@ -1,18 +1,20 @@
 from __future__ import annotations
 
 import json
-from unittest.mock import Mock
+import threading
+from unittest.mock import MagicMock, Mock
 
+import httpx
 import pytest
 
-from providers.openrouter import OpenRouterProvider
+from providers.openrouter import OpenRouterProvider, _derive_models_api_flags
 from providers.registries.openrouter import OpenRouterModelRegistry
 
 
 def _reset_openrouter_models_api_cache() -> None:
-    OpenRouterProvider._models_api_cache = None
-    OpenRouterProvider._models_api_last_fetch = None
-    OpenRouterProvider._models_api_last_failure = None
+    OpenRouterProvider._models_api_cache = {}
+    OpenRouterProvider._models_api_last_failure = {}
+    OpenRouterProvider._models_api_inflight = {}
 
 
 @pytest.fixture(autouse=True)
@@ -97,3 +99,188 @@ def test_unknown_openrouter_model_api_failure_falls_back_to_generic():
     assert capabilities.max_output_tokens == 32_768
     assert capabilities.allow_code_generation is True
 
+
+def test_models_api_fetches_reuse_pooled_http_client(monkeypatch):
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"data": [{"id": "acme/pooled-model"}]})
+
+    pooled = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(OpenRouterProvider, "_models_api_http_client", pooled)
+
+    provider = OpenRouterProvider(api_key="test-key")
+    assert provider._get_models_api_http_client() is pooled
+
+    assert provider._fetch_models_api() == [{"id": "acme/pooled-model"}]
+    assert provider._fetch_models_api() == [{"id": "acme/pooled-model"}]
+
+    assert len(requests) == 2
+    assert requests[0].headers["Authorization"] == "Bearer test-key"
+    assert not pooled.is_closed
+    pooled.close()
+
+
+def test_fresh_models_api_cache_is_served_without_taking_the_lock(monkeypatch):
+    provider = OpenRouterProvider(api_key="test-key")
+    provider._fetch_models_api = Mock(return_value=[{"id": "acme/cached-model"}])  # type: ignore[method-assign]
+    index = provider._get_models_api_cache()
+
+    lock = MagicMock()
+    monkeypatch.setattr(OpenRouterProvider, "_models_api_lock", lock)
+
+    assert provider._get_models_api_cache() is index
+    lock.__enter__.assert_not_called()
+
+
+def test_models_api_capabilities_are_memoised_until_refresh():
+    provider = OpenRouterProvider(api_key="test-key")
+    provider._fetch_models_api = Mock(  # type: ignore[method-assign]
+        return_value=[{"id": "acme/memo-model", "context_length": 64_000}]
+    )
+    provider._build_capabilities_from_models_api = Mock(  # type: ignore[method-assign]
+        wraps=provider._build_capabilities_from_models_api
+    )
+
+    first = provider.get_capabilities("acme/memo-model")
+    second = provider.get_capabilities("acme/memo-model")
+    third = provider.get_capabilities("acme/memo-model")
+    assert first is second is third
+    assert first.context_window == 64_000
+    assert provider._build_capabilities_from_models_api.call_count == 1
+
+    # A successful refresh invalidates the memo.
+    _, index = OpenRouterProvider._models_api_cache[provider._models_api_key]
+    OpenRouterProvider._models_api_cache[provider._models_api_key] = (0.0, index)
+    provider.get_capabilities("acme/other-model")
+    provider.get_capabilities("acme/memo-model")
+    assert provider._fetch_models_api.call_count == 2
+    assert provider._build_capabilities_from_models_api.call_count == 2
+
+
+def test_concurrent_models_api_refreshes_share_one_fetch():
+    provider = OpenRouterProvider(api_key="test-key")
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_fetch():
+        started.set()
+        release.wait(5)
+        return [{"id": "acme/shared-model"}]
+
+    fetch_mock = Mock(side_effect=slow_fetch)
+    provider._fetch_models_api = fetch_mock  # type: ignore[method-assign]
+
+    results: list[dict] = []
+    leader = threading.Thread(target=lambda: results.append(provider._get_models_api_cache()))
+    leader.start()
+    assert started.wait(5)
+
+    followers = [threading.Thread(target=lambda: results.append(provider._get_models_api_cache())) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert fetch_mock.call_count == 1
+    assert len(results) == 4
+    assert all(result is results[0] for result in results)
+    assert "acme/shared-model" in results[0]
+
+
+def test_models_api_support_flags_are_cached_per_shape():
+    provider = OpenRouterProvider(api_key="test-key")
+    _derive_models_api_flags.cache_clear()
+    shape = {
+        "architecture": {"input_modalities": ["text", "image", None]},
+        "supported_parameters": ["tools", "structured_outputs", 7],
+    }
+
+    first = provider._build_capabilities_from_models_api("acme/one", {"id": "acme/one", **shape})
+    second = provider._build_capabilities_from_models_api("acme/two", {"id": "acme/two", **shape})
+
+    for capabilities in (first, second):
+        assert capabilities.supports_images is True
+        assert capabilities.supports_function_calling is True
+        assert capabilities.supports_json_mode is True
+        assert capabilities.supports_temperature is False
+    info = _derive_models_api_flags.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+
+
+def test_models_api_misses_are_negatively_cached():
+    provider = OpenRouterProvider(api_key="test-key")
+    provider._fetch_models_api = Mock(return_value=[{"id": "acme/known"}])  # type: ignore[method-assign]
+    provider._lookup_dynamic_model_info = Mock(wraps=provider._lookup_dynamic_model_info)  # type: ignore[method-assign]
+
+    first = provider.get_capabilities("acme/typo-model")
+    second = provider.get_capabilities("acme/typo-model")
+
+    assert first is second
+    assert first.context_window == 32_768
+    assert provider._lookup_dynamic_model_info.call_count == 1
+
+
+def test_models_api_misses_during_outage_are_not_cached():
+    provider = OpenRouterProvider(api_key="test-key")
+    provider._fetch_models_api = Mock(side_effect=RuntimeError("boom"))  # type: ignore[method-assign]
+
+    provider.get_capabilities("acme/later-model")
+    assert "acme/later-model" not in provider._negative_lookups
+
+
+def test_models_api_index_prefers_ids_over_canonical_slugs():
+    first = {"id": "acme/model", "canonical_slug": "acme/model-2024"}
+    second = {"id": "acme/model-2024"}
+    index = OpenRouterProvider._build_models_api_index([first, "junk", {"id": 7}, second, {"canonical_slug": ""}])
+
+    assert index == {"acme/model": first, "acme/model-2024": second}
+
+
+def test_models_api_entry_with_null_sections_uses_defaults():
+    provider = OpenRouterProvider(api_key="test-key")
+
+    capabilities = provider._build_capabilities_from_models_api(
+        "acme/sparse",
+        {
+            "id": "acme/sparse",
+            "context_length": None,
+            "top_provider": None,
+            "architecture": {"input_modalities": None},
+            "supported_parameters": None,
+        },
+    )
+
+    assert capabilities.context_window == 32_768
+    assert capabilities.max_output_tokens == 32_768
+    assert capabilities.supports_images is False
+    assert capabilities.supports_function_calling is False
+
+
+def test_models_api_cache_is_isolated_per_api_key():
+    first = OpenRouterProvider(api_key="key-one")
+    second = OpenRouterProvider(api_key="key-two")
+    again = OpenRouterProvider(api_key="key-one")
+    first._fetch_models_api = Mock(return_value=[{"id": "acme/one"}])  # type: ignore[method-assign]
+    second._fetch_models_api = Mock(return_value=[{"id": "acme/two"}])  # type: ignore[method-assign]
+    again._fetch_models_api = Mock(return_value=[])  # type: ignore[method-assign]
+
+    assert set(first._get_models_api_cache()) == {"acme/one"}
+    assert set(second._get_models_api_cache()) == {"acme/two"}
+    assert again._get_models_api_cache() is first._get_models_api_cache()
+    again._fetch_models_api.assert_not_called()
+
+
+def test_models_api_cooldown_returns_none_without_raising():
+    provider = OpenRouterProvider(api_key="test-key")
+    fetch_mock = Mock(side_effect=RuntimeError("boom"))
+    provider._fetch_models_api = fetch_mock  # type: ignore[method-assign]
+
+    assert provider._try_get_models_api_cache() is None
+    assert provider._try_get_models_api_cache() is None
+    assert fetch_mock.call_count == 1
+
+    with pytest.raises(RuntimeError, match="unavailable"):
+        provider._get_models_api_cache()
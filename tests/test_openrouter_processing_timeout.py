@@ -1,4 +1,5 @@
 import asyncio
+import gc
 import json
 
 import httpx
@@ -130,4 +131,171 @@ def test_openrouter_processing_timeout_responses_completed_extracts_output_text(
         model_name="o3-pro",
     )
     assert result.content == "hello"
+    assert result.metadata["id"] == "resp_1"
+    assert result.metadata["created"] == 123
+    assert result.metadata["last_event_type"] == "response.completed"
     assert stream.closed is True
+
+
+def test_openrouter_streaming_reuses_async_client_until_closed(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_PROCESSING_TIMEOUT", "0.2")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        stream = DelayedSSEStream(
+            [
+                (0.0, b'data: {"id":"gen-1","choices":[{"index":0,"delta":{"content":"ok"}}]}\n\n'),
+                (0.0, b"data: [DONE]\n\n"),
+            ]
+        )
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream)
+
+    provider = OpenRouterProvider(api_key="dummy")
+    provider._test_transport = httpx.MockTransport(handler)  # noqa: SLF001
+
+    completion_params = {"model": "z-ai/glm-4.7", "messages": [], "stream": True}
+    first = provider._generate_openrouter_chat_completions_streaming(  # noqa: SLF001
+        completion_params=completion_params,
+        model_name="z-ai/glm-4.7",
+    )
+    client = provider._async_client  # noqa: SLF001
+    second = provider._generate_openrouter_chat_completions_streaming(  # noqa: SLF001
+        completion_params=completion_params,
+        model_name="z-ai/glm-4.7",
+    )
+
+    assert first.content == second.content == "ok"
+    assert client is not None
+    assert provider._async_client is client  # noqa: SLF001
+
+    provider.close()
+    assert client.is_closed
+    assert provider._async_client is None  # noqa: SLF001
+
+
+def test_openrouter_streaming_loop_cleaned_up_when_provider_discarded(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_PROCESSING_TIMEOUT", "0.2")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        stream = DelayedSSEStream(
+            [
+                (0.0, b'data: {"choices":[{"delta":{"content":"ok"}}]}\n\n'),
+                (0.0, b"data: [DONE]\n\n"),
+            ]
+        )
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream)
+
+    provider = OpenRouterProvider(api_key="dummy")
+    provider._test_transport = httpx.MockTransport(handler)  # noqa: SLF001
+
+    result = provider._generate_openrouter_chat_completions_streaming(  # noqa: SLF001
+        completion_params={"model": "z-ai/glm-4.7", "messages": [], "stream": True},
+        model_name="z-ai/glm-4.7",
+    )
+    client = provider._async_client  # noqa: SLF001
+    loop, thread = provider._streaming_loop, provider._streaming_thread  # noqa: SLF001
+
+    # Dropped without close(), as on key rotation: the finalizer must do what close() does.
+    del provider
+    gc.collect()
+
+    assert result.content == "ok"
+    assert client.is_closed
+    assert not thread.is_alive()
+    assert loop.is_closed()
+
+
+def test_openrouter_streaming_handles_frames_split_across_chunks(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_PROCESSING_TIMEOUT", "0.2")
+
+    stream = DelayedSSEStream(
+        [
+            (0.0, b": OPENROUTER PROCESSING\r\n\r\ndata: {\"choices\":[{\"delta\":{\"content\":\"h\xc3"),
+            (0.0, b"\xa9llo\"}}]}\r\n\r\ndata: {\"choices\":[{\"delta\":{\"content\":\"!\"}}]}"),
+            (0.0, b"\r\n\r\ndata: [DONE]"),
+        ]
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream)
+
+    provider = OpenRouterProvider(api_key="dummy")
+    provider._test_transport = httpx.MockTransport(handler)  # noqa: SLF001
+
+    result = provider._generate_openrouter_chat_completions_streaming(  # noqa: SLF001
+        completion_params={"model": "z-ai/glm-4.7", "messages": [], "stream": True},
+        model_name="z-ai/glm-4.7",
+    )
+    provider.close()
+
+    assert result.content == "héllo!"
+
+
+def test_openrouter_streaming_reports_final_cumulative_usage(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_PROCESSING_TIMEOUT", "0.2")
+
+    stream = DelayedSSEStream(
+        [
+            (
+                0.0,
+                b'data: {"choices":[{"delta":{"content":"a"}}],"usage":{"prompt_tokens":5,"completion_tokens":1}}\n\n',
+            ),
+            (
+                0.0,
+                b'data: {"choices":[{"delta":{"content":"b"}}],"usage":{"prompt_tokens":5,"completion_tokens":2}}\n\n',
+            ),
+            (0.0, b'data: {"choices":[{"delta":{},"finish_reason":"stop"}]}\n\n'),
+            (0.0, b"data: [DONE]\n\n"),
+        ]
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream)
+
+    provider = OpenRouterProvider(api_key="dummy")
+    provider._test_transport = httpx.MockTransport(handler)  # noqa: SLF001
+
+    calls = []
+    original = provider._extract_usage_dict  # noqa: SLF001
+    monkeypatch.setattr(provider, "_extract_usage_dict", lambda usage: calls.append(usage) or original(usage))
+
+    result = provider._generate_openrouter_chat_completions_streaming(  # noqa: SLF001
+        completion_params={"model": "z-ai/glm-4.7", "messages": [], "stream": True},
+        model_name="z-ai/glm-4.7",
+    )
+    provider.close()
+
+    assert result.content == "ab"
+    assert result.usage == {"input_tokens": 5, "output_tokens": 2, "total_tokens": 7}
+    assert len(calls) == 1
+
+
+def test_openrouter_streaming_keeps_last_valid_usage(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_PROCESSING_TIMEOUT", "0.2")
+
+    stream = DelayedSSEStream(
+        [
+            (
+                0.0,
+                b'data: {"choices":[{"delta":{"content":"a"}}],"usage":{"prompt_tokens":3,"completion_tokens":4}}\n\n',
+            ),
+            (0.0, b'data: {"choices":[{"delta":{"content":"b"}}],"usage":{}}\n\n'),
+            (0.0, b'data: {"choices":[],"usage":{"prompt_tokens":0,"completion_tokens":0}}\n\n'),
+            (0.0, b'data: {"choices":[],"usage":"n/a"}\n\n'),
+            (0.0, b"data: [DONE]\n\n"),
+        ]
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream)
+
+    provider = OpenRouterProvider(api_key="dummy")
+    provider._test_transport = httpx.MockTransport(handler)  # noqa: SLF001
+
+    result = provider._generate_openrouter_chat_completions_streaming(  # noqa: SLF001
+        completion_params={"model": "z-ai/glm-4.7", "messages": [], "stream": True},
+        model_name="z-ai/glm-4.7",
+    )
+    provider.close()
+
+    assert result.content == "ab"
+    assert result.usage == {"input_tokens": 3, "output_tokens": 4, "total_tokens": 7}
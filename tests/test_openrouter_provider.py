@@ -380,6 +380,9 @@ class TestOpenRouterFunctionality:
         assert "X-Title" in provider.DEFAULT_HEADERS
         assert provider.DEFAULT_HEADERS["X-Title"] == "PAL MCP Server"
 
+        with pytest.raises(TypeError):
+            provider.DEFAULT_HEADERS["X-Title"] = "Mutated"
+
     def test_openrouter_model_registry_initialized(self):
         """Test that model registry is properly initialized."""
         provider = OpenRouterProvider(api_key="test-key")
@@ -387,3 +390,74 @@ class TestOpenRouterFunctionality:
         # Registry should be initialized
         assert hasattr(provider, "_registry")
         assert provider._registry is not None
+
+    def test_registry_snapshot_is_built_once(self):
+        """Model listing resolves registry entries once and reuses the snapshot."""
+        provider = OpenRouterProvider(api_key="test-key")
+
+        custom_config = Mock()
+        custom_config.provider = ProviderType.CUSTOM
+        openrouter_config = Mock()
+        openrouter_config.provider = ProviderType.OPENROUTER
+        openrouter_config.aliases = []
+        openrouter_config.get_effective_capability_rank = Mock(return_value=50)
+
+        mock_registry = Mock()
+        mock_registry.list_models.return_value = ["acme/model", "local-llama"]
+        mock_registry.resolve.side_effect = lambda name: openrouter_config if name == "acme/model" else custom_config
+        provider._registry = mock_registry
+
+        assert provider.list_models(respect_restrictions=False) == ["acme/model"]
+        assert provider.get_all_model_capabilities() == {"acme/model": openrouter_config}
+        assert mock_registry.resolve.call_count == 2
+
+        provider._invalidate_capability_cache()
+        provider.get_all_model_capabilities()
+        assert mock_registry.resolve.call_count == 4
+
+    def test_alias_resolution_is_cached_case_insensitively(self):
+        """Aliases and their canonical names resolve from the cache after the first lookup."""
+        provider = OpenRouterProvider(api_key="test-key")
+
+        config = Mock()
+        config.model_name = "acme/Model-X"
+        mock_registry = Mock()
+        mock_registry.resolve.return_value = config
+        provider._registry = mock_registry
+
+        assert provider._resolve_model_name("mx") == "acme/Model-X"
+        assert provider._resolve_model_name("MX") == "acme/Model-X"
+        assert provider._resolve_model_name("acme/model-x") == "acme/Model-X"
+        assert mock_registry.resolve.call_count == 1
+
+    def test_list_models_checks_allow_set_before_is_allowed(self):
+        """Canonical allow-set hits and unrestricted listings skip per-model is_allowed calls."""
+        provider = OpenRouterProvider(api_key="test-key")
+
+        configs = {}
+        for name, aliases in (("acme/allowed", []), ("acme/aliased", ["short"]), ("acme/blocked", [])):
+            config = Mock()
+            config.provider = ProviderType.OPENROUTER
+            config.aliases = aliases
+            config.get_effective_capability_rank = Mock(return_value=50)
+            configs[name] = config
+
+        mock_registry = Mock()
+        mock_registry.list_models.return_value = list(configs)
+        mock_registry.resolve.side_effect = configs.get
+        provider._registry = mock_registry
+
+        service = Mock()
+        service.get_allowed_models.return_value = {"acme/allowed", "short"}
+        service.is_allowed.side_effect = lambda provider_type, name: name == "short"
+        with patch("utils.model_restrictions.get_restriction_service", return_value=service):
+            assert sorted(provider.list_models()) == ["acme/aliased", "acme/allowed"]
+        checked = [call.args[1] for call in service.is_allowed.call_args_list]
+        assert "acme/allowed" not in checked
+        assert "acme/blocked" in checked
+
+        service.reset_mock()
+        service.get_allowed_models.return_value = None
+        with patch("utils.model_restrictions.get_restriction_service", return_value=service):
+            assert len(provider.list_models()) == 3
+        service.is_allowed.assert_not_called()
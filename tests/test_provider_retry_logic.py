@@ -71,3 +71,31 @@ def test_openai_provider_bails_on_non_retryable_error(monkeypatch):
 
     assert "after 1 attempt" in str(excinfo.value)
     assert attempts["count"] == 1
+
+
+def test_retry_delays_are_jittered_and_respect_retry_after(monkeypatch):
+    """Retry sleeps stay within [delay/2, delay] and never undercut a server Retry-After."""
+
+    sleeps = []
+    monkeypatch.setattr("providers.base.time.sleep", sleeps.append)
+
+    provider = OpenAIModelProvider(api_key="test-key")
+
+    class ThrottledError(RuntimeError):
+        def __init__(self, headers):
+            super().__init__("temporary overload")
+            self.response = SimpleNamespace(headers=headers)
+
+    errors = [ThrottledError({}), ThrottledError({"retry-after": "7"}), ThrottledError({"retry-after-ms": "250"})]
+
+    def operation():
+        if errors:
+            raise errors.pop(0)
+        return "done"
+
+    result = provider._run_with_retries(operation, max_attempts=4, delays=[2, 3, 5])
+
+    assert result == "done"
+    assert 1.0 <= sleeps[0] <= 2.0
+    assert sleeps[1] == 7.0
+    assert 2.5 <= sleeps[2] <= 5.0
@@ -69,6 +69,27 @@ class TestModelProviderRegistry:
         assert provider is not None
         assert isinstance(provider, GeminiModelProvider)
 
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": "test-key"})
+    @pytest.mark.no_mock_provider
+    def test_get_provider_for_model_remembers_provider_type(self):
+        """Repeat lookups re-validate only the provider that accepted the model last time"""
+        ModelProviderRegistry.register_provider(ProviderType.GOOGLE, GeminiModelProvider)
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+
+        first = ModelProviderRegistry.get_provider_for_model("o3-mini")
+        assert isinstance(first, OpenAIModelProvider)
+
+        gemini = ModelProviderRegistry.get_provider(ProviderType.GOOGLE)
+        with patch.object(gemini, "validate_model_name", wraps=gemini.validate_model_name) as gemini_validate:
+            assert ModelProviderRegistry.get_provider_for_model("o3-mini") is first
+        gemini_validate.assert_not_called()
+
+        rotated = ModelProviderRegistry.rotate_provider(ProviderType.OPENAI)
+        assert ModelProviderRegistry.get_provider_for_model("o3-mini") is rotated
+
+        ModelProviderRegistry.unregister_provider(ProviderType.OPENAI)
+        assert ModelProviderRegistry.get_provider_for_model("o3-mini") is None
+
     def test_get_available_providers(self):
         """Test getting list of available providers"""
         ModelProviderRegistry.register_provider(ProviderType.GOOGLE, GeminiModelProvider)
@@ -138,3 +138,32 @@ def test_edge_cases_and_fallbacks():
 
     simple_429_error = MockSimple429Error()
     assert provider._is_error_retryable(simple_429_error), "Simple 429 without type info should be retryable"
+
+
+def test_openai_sdk_status_errors_use_structured_fields():
+    """SDK status errors are classified from their attributes, not their message text."""
+    import httpx
+    import openai
+
+    provider = OpenAIModelProvider(api_key="test-key")
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+    def make_rate_limit_error(body):
+        return openai.RateLimitError("Error code: 429", response=httpx.Response(429, request=request), body=body)
+
+    token_error = make_rate_limit_error(
+        {"message": "Request too large", "type": "tokens", "code": "rate_limit_exceeded"}
+    )
+    assert not provider._is_error_retryable(token_error), "Token-related 429 should not be retryable"
+
+    context_error = make_rate_limit_error({"message": "Too long", "code": "context_length_exceeded"})
+    assert not provider._is_error_retryable(context_error), "Context length errors should not be retryable"
+
+    requests_error = make_rate_limit_error({"message": "Too many requests", "type": "requests"})
+    assert provider._is_error_retryable(requests_error), "Request rate limiting should be retryable"
+
+    # A non-429 status is never treated as a rate limit, even if "429" appears in the message.
+    bad_request = openai.BadRequestError(
+        "Error code: 400 - prompt mentions 429", response=httpx.Response(400, request=request), body=None
+    )
+    assert not provider._is_error_retryable(bad_request), "400 errors should not be retryable"
@@ -0,0 +1,64 @@
+"""Tests for the opt-in on-disk response cache."""
+
+import httpx
+
+from providers.openrouter import OpenRouterProvider
+from providers.shared import ModelResponse, ProviderType
+from utils.response_cache import load_cached_response, response_cache_key, store_cached_response
+
+
+def test_response_cache_key_ignores_dict_ordering():
+    first = response_cache_key(ProviderType.OPENROUTER, "m", {"a": 1, "b": [1, 2]})
+    second = response_cache_key(ProviderType.OPENROUTER, "m", {"b": [1, 2], "a": 1})
+
+    assert first == second
+    assert first != response_cache_key(ProviderType.OPENROUTER, "other", {"a": 1, "b": [1, 2]})
+
+
+def test_response_cache_round_trip_and_corrupt_entries(tmp_path):
+    response = ModelResponse(
+        content="hello",
+        usage={"input_tokens": 1, "output_tokens": 2, "total_tokens": 3},
+        model_name="m",
+        friendly_name="OpenRouter",
+        provider=ProviderType.OPENROUTER,
+        metadata={"id": "gen-1"},
+    )
+
+    store_cached_response(tmp_path, "abc", response)
+    assert load_cached_response(tmp_path, "abc") == response
+
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+    assert load_cached_response(tmp_path, "broken") is None
+    assert load_cached_response(tmp_path, "missing") is None
+
+
+def test_openrouter_streaming_serves_identical_requests_from_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("PALLY_RESPONSE_CACHE_DIR", str(tmp_path))
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body = b'data: {"id":"gen-1","choices":[{"delta":{"content":"cached"}}]}\n\ndata: [DONE]\n\n'
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body)
+
+    provider = OpenRouterProvider(api_key="dummy")
+    provider._test_transport = httpx.MockTransport(handler)  # noqa: SLF001
+
+    completion_params = {"model": "z-ai/glm-4.7", "messages": [{"role": "user", "content": "hi"}], "stream": True}
+    try:
+        first = provider._generate_openrouter_chat_completions_streaming(  # noqa: SLF001
+            completion_params=completion_params,
+            model_name="z-ai/glm-4.7",
+        )
+        second = provider._generate_openrouter_chat_completions_streaming(  # noqa: SLF001
+            completion_params=dict(completion_params),
+            model_name="z-ai/glm-4.7",
+        )
+    finally:
+        provider.close()
+
+    assert len(requests) == 1
+    assert first.content == second.content == "cached"
+    assert second.metadata["response_cache_hit"] is True
+    assert "response_cache_hit" not in first.metadata
@@ -130,3 +130,505 @@ def test_build_conversation_history_adds_summary_for_omitted_turns(tmp_path: Pat
     history, _tokens = build_conversation_history(context, model_context=_DummyModelContext())
 
     assert "=== SUMMARY OF OLDER TURNS (OMITTED) ===" in history
+
+
+def _linear_trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Reference implementation: the original shrink-until-it-fits loop."""
+    from utils.token_utils import estimate_tokens
+
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lines = text.splitlines()
+    if not lines:
+        return ""
+    head, tail = 120, 60
+    while head > 10 and tail > 10:
+        candidate = "\n".join(lines[:head] + ["", "... (truncated) ...", ""] + lines[-tail:])
+        if estimate_tokens(candidate) <= max_tokens:
+            return candidate
+        head = max(10, int(head * 0.8))
+        tail = max(10, int(tail * 0.8))
+    return "\n".join(lines[: max(10, head)])
+
+
+@pytest.mark.parametrize("max_tokens", [0, 5, 40, 120, 300, 700, 1_500, 5_000, 50_000])
+@pytest.mark.parametrize("line_count", [3, 90, 2_000])
+@pytest.mark.parametrize("suffix", ["", "\n", "\n\n"])
+@pytest.mark.parametrize("separator", ["\n", "\r\n", "\f\n", "\n\v", "\u2028"])
+def test_trim_to_tokens_matches_linear_shrink(max_tokens: int, line_count: int, suffix: str, separator: str):
+    from utils.file_reduction import _trim_to_tokens
+
+    # Short inputs get long lines so the head and tail excerpts overlap and still need trimming.
+    width = 1 if line_count >= 100 else 41
+    text = separator.join(f"line {i}: " + "x" * (i % 37) * width for i in range(line_count)) + suffix
+
+    assert _trim_to_tokens(text, max_tokens) == _linear_trim_to_tokens(text, max_tokens)
+
+
+def test_reduce_generic_text_splits_form_feeds_like_splitlines():
+    from utils.file_reduction import reduce_generic_text
+
+    # Page breaks (e.g. in GNU-style C sources) are line breaks for str.splitlines.
+    source = "".join(f"int f{i}(void);\n\f\n" if i % 10 == 0 else f"int f{i}(void);\n" for i in range(2_000))
+
+    reduced = reduce_generic_text(source, max_tokens=500, file_path="pages.c")
+
+    assert reduced.was_reduced
+    assert "... (truncated) ..." in reduced.content
+    assert "\f" not in reduced.content
+    assert "int f0(void);" in reduced.content
+    assert "int f1999(void);" in reduced.content
+
+
+def test_reduce_python_source_outline_stays_within_budget():
+    from utils.file_reduction import reduce_python_source
+    from utils.token_utils import estimate_tokens
+
+    source = "import os\nimport sys\n\n" + "".join(
+        f'def function_{i}(arg):\n    """Docstring {i}."""\n    return arg + {i}\n\n' for i in range(400)
+    )
+
+    reduced = reduce_python_source(source, max_tokens=300)
+
+    assert reduced.was_reduced
+    assert reduced.content.startswith("[NOTE: File reduced to fit token budget. Showing outline of structure.]")
+    assert "import os" in reduced.content
+    assert "def function_0(arg):" in reduced.content
+    assert '""" Docstring 0. """' in reduced.content
+    assert estimate_tokens(reduced.content) <= 300
+
+
+def test_file_type_weight_matches_file_categories():
+    from utils.file_relevance import file_type_weight
+    from utils.file_types import FILE_CATEGORIES, get_file_category
+
+    category_weights = {"programming": 1.0, "scripts": 0.9, "web": 0.7, "configs": 0.6, "docs": 0.4, "text_data": 0.2}
+    extensions = {extension for group in FILE_CATEGORIES.values() for extension in group} | {".unknown", ""}
+    extensions.discard(".lock")  # Lockfiles are always down-weighted.
+    for extension in extensions:
+        expected = category_weights.get(get_file_category(f"module{extension}"), 0.3)
+        assert file_type_weight(f"/repo/pkg/module{extension.upper()}") == expected
+
+    assert file_type_weight("/repo/poetry.lock") == 0.05
+    assert file_type_weight("/repo/static/app.min.js") == 0.10
+
+
+def test_rank_files_resolves_each_file_once(tmp_path: Path, monkeypatch):
+    from utils import file_relevance
+
+    files = []
+    for name in ("a.py", "b.md", "c.json"):
+        path = tmp_path / name
+        path.write_text("x", encoding="utf-8")
+        files.append(str(path))
+
+    calls = []
+    original_realpath = os.path.realpath
+
+    def counting_realpath(path, *args, **kwargs):
+        calls.append(path)
+        return original_realpath(path, *args, **kwargs)
+
+    monkeypatch.setattr(os.path, "realpath", counting_realpath)
+    ctx = FileRankingContext(prompt="Please review a.py", explicit_paths=set(), project_root=str(tmp_path))
+
+    ranked = file_relevance.rank_files(files, ctx=ctx)
+
+    assert ranked[0] == original_realpath(tmp_path / "a.py")
+    assert sorted(calls) == sorted(files)
+
+
+def test_collect_python_dependencies_finds_nested_imports(tmp_path: Path):
+    from utils.file_relevance import collect_python_dependencies
+
+    for name in ("top", "guarded", "fallback", "local"):
+        (tmp_path / f"{name}.py").write_text("x = 1\n", encoding="utf-8")
+    seed = tmp_path / "seed.py"
+    seed.write_text(
+        "import top\n"
+        "if True:\n"
+        "    import guarded\n"
+        "try:\n"
+        "    import missing\n"
+        "except ImportError:\n"
+        "    import fallback\n"
+        "def handler():\n"
+        "    values = [len(str(i)) for i in range(3)]\n"
+        "    from local import x\n"
+        "    return values, x\n",
+        encoding="utf-8",
+    )
+
+    deps = collect_python_dependencies(seed_files=[str(seed)], project_root=str(tmp_path), max_files=10)
+
+    assert {Path(p).name for p in deps} == {"top.py", "guarded.py", "fallback.py", "local.py"}
+
+
+def test_collect_python_dependencies_probes_each_candidate_once(tmp_path: Path, monkeypatch):
+    from utils.file_relevance import collect_python_dependencies
+
+    (tmp_path / "shared.py").write_text("x = 1\n", encoding="utf-8")
+    seeds = []
+    for i in range(3):
+        seed = tmp_path / f"seed_{i}.py"
+        seed.write_text("import os\nimport json\nimport numpy.linalg\nimport shared\n", encoding="utf-8")
+        seeds.append(str(seed))
+
+    probes = []
+    original_isfile = os.path.isfile
+
+    def counting_isfile(path):
+        probes.append(path)
+        return original_isfile(path)
+
+    monkeypatch.setattr(os.path, "isfile", counting_isfile)
+
+    deps = collect_python_dependencies(seed_files=seeds, project_root=str(tmp_path), max_files=10)
+
+    assert {Path(p).name for p in deps} == {"shared.py"}
+    assert len(probes) == len(set(probes))
+    assert not any("numpy" in probe for probe in probes)
+
+
+def test_extract_path_mentions_matches_common_path_forms():
+    from utils.file_relevance import extract_path_mentions
+
+    prompt = r"Compare src/app/main.py with C:\repo\tools\run.ps1 and setup.cfg, then check README"
+
+    assert extract_path_mentions(prompt) == {"src/app/main.py", r"C:\repo\tools\run.ps1", "setup.cfg"}
+    assert extract_path_mentions("") == set()
+
+
+def test_reduce_python_source_lists_imports_before_definitions():
+    from utils.file_reduction import reduce_python_source
+
+    source = "\n".join(
+        [
+            "import os",
+            "def first():",
+            '    """First helper."""',
+            "    return 1",
+            "from typing import Any",
+            "class Second:",
+            "    pass",
+        ]
+        + ["# filler line to force reduction"] * 200
+    )
+
+    outline = reduce_python_source(source, max_tokens=200).content.splitlines()
+
+    assert outline[1:] == [
+        "import os",
+        "from typing import Any",
+        "def first():",
+        '""" First helper. """',
+        "class Second:",
+    ]
+
+
+def test_rank_files_matches_basename_and_path_mentions(tmp_path: Path):
+    from utils.file_relevance import rank_files
+
+    files = []
+    for rel in ("pkg/models.py", "pkg/views.py", "other/views.py", "docs/guide.md", "notes.txt"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x", encoding="utf-8")
+        files.append(str(path))
+    ctx = FileRankingContext(prompt="Check guide.md and pkg/views.py", explicit_paths=set(), project_root=str(tmp_path))
+
+    ranked = [Path(p).relative_to(tmp_path.resolve()).as_posix() for p in rank_files(files, ctx=ctx)]
+
+    assert set(ranked[:2]) == {"pkg/views.py", "docs/guide.md"}
+    assert ranked[2:] == ["pkg/models.py", "other/views.py", "notes.txt"]
+
+
+def test_rank_files_without_signals_orders_by_type_without_resolving(monkeypatch):
+    from utils import file_relevance
+
+    def fail_realpath(path, *args, **kwargs):
+        raise AssertionError("paths should not be resolved without ranking signals")
+
+    monkeypatch.setattr(os.path, "realpath", fail_realpath)
+    ctx = FileRankingContext(prompt="", explicit_paths=set(), project_root=None)
+    files = ["repo/poetry.lock", "repo/README.md", "repo/b.py", "repo/a.py"]
+
+    assert file_relevance.rank_files(files, ctx=ctx) == ["repo/b.py", "repo/a.py", "repo/README.md", "repo/poetry.lock"]
+
+
+def test_collect_python_dependencies_parses_seeds_in_parallel_deterministically(tmp_path: Path):
+    from utils.file_relevance import collect_python_dependencies
+
+    seeds = []
+    for i in range(12):
+        (tmp_path / f"dep_{i:02d}.py").write_text("x = 1\n", encoding="utf-8")
+        seed = tmp_path / f"seed_{i:02d}.py"
+        seed.write_text(f"import dep_{i:02d}\n", encoding="utf-8")
+        seeds.append(str(seed))
+    (tmp_path / "broken.py").write_text("def broken(:\n", encoding="utf-8")
+    seeds.append(str(tmp_path / "broken.py"))
+
+    all_deps = collect_python_dependencies(seed_files=set(seeds), project_root=str(tmp_path), max_files=50)
+    first_dep = collect_python_dependencies(seed_files=seeds[::-1], project_root=str(tmp_path), max_files=1)
+
+    assert len(all_deps) == 12
+    assert {Path(p).name for p in first_dep} == {"dep_00.py"}
+
+
+def test_parse_python_file_reuses_tree_until_file_changes(tmp_path: Path):
+    from utils.file_reduction import _parse_cached, parse_python_file, reduce_python_source
+
+    _parse_cached.cache_clear()
+    path = tmp_path / "module.py"
+    path.write_text("import os\n\ndef run():\n    return os.getcwd()\n", encoding="utf-8")
+
+    first = parse_python_file(path)
+    assert parse_python_file(str(path)) is first
+    reduce_python_source(path.read_text() + "# pad\n" * 400, max_tokens=300, file_path=str(path))
+    assert _parse_cached.cache_info().misses == 1
+
+    path.write_text("import sys\n", encoding="utf-8")
+    os.utime(path, ns=(0, 0))
+    assert parse_python_file(path) is not first
+    assert parse_python_file(tmp_path / "missing.py") is None
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [("a\nb\n", "a\nb\n"), ("a\r\nb\r\n", "a\nb\n"), ("a\rb\r\nc", "a\nb\nc"), ("", "")],
+)
+def test_normalize_newlines(source: str, expected: str):
+    from utils.file_reduction import _normalize_newlines
+
+    assert _normalize_newlines(source) == expected
+
+
+def test_rank_files_reuses_resolved_explicit_paths(tmp_path: Path):
+    from utils.file_relevance import _resolved_explicit_paths, rank_files
+
+    _resolved_explicit_paths.cache_clear()
+    files = []
+    for name in ("a.py", "b.py"):
+        path = tmp_path / name
+        path.write_text("x", encoding="utf-8")
+        files.append(str(path))
+
+    for _ in range(3):
+        ctx = FileRankingContext(prompt="review", explicit_paths={files[0]}, project_root=str(tmp_path))
+        assert rank_files(files, ctx=ctx)[0] == str((tmp_path / "a.py").resolve())
+
+    info = _resolved_explicit_paths.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("", ""),
+        ("\n\n  \n", ""),
+        ("Summary.", "Summary."),
+        ("\n   Summary line.  \n\nDetails.\n", "Summary line."),
+        ("\f\n Summary.\u2028Details.\n", "Summary."),
+        ("\r\n Summary line.\r\n", "Summary line."),
+    ],
+)
+def test_first_nonempty_line(text: str, expected: str):
+    from utils.file_reduction import _first_nonempty_line
+
+    assert _first_nonempty_line(text) == expected
+
+
+@pytest.mark.parametrize("prompt", ["", "Please review main.py"])
+def test_rank_files_top_k_matches_full_ranking_prefix(tmp_path: Path, prompt: str):
+    from utils.file_relevance import rank_files
+
+    files = []
+    for i, suffix in enumerate([".py", ".md", ".json", ".lock", ".txt", ".py", ".sh"] * 3):
+        path = tmp_path / ("main.py" if i == 0 else f"file_{i:02d}{suffix}")
+        path.write_text("x", encoding="utf-8")
+        files.append(str(path))
+    ctx = FileRankingContext(prompt=prompt, explicit_paths=set(), project_root=str(tmp_path))
+
+    full = rank_files(files, ctx=ctx)
+
+    assert rank_files(files, ctx=ctx, top_k=5) == full[:5]
+    assert rank_files(files, ctx=ctx, top_k=0) == []
+    assert rank_files(files, ctx=ctx, top_k=100) == full
+
+
+def test_reduce_python_source_small_budget_skips_outline(monkeypatch):
+    from utils import file_reduction
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("tiny budgets should not parse the source")
+
+    monkeypatch.setattr(file_reduction.ast, "parse", fail_parse)
+    source = "\n".join(f"def f{i}():\n    return {i}" for i in range(200))
+
+    reduced = file_reduction.reduce_python_source(source, max_tokens=100, file_path="/repo/big.py")
+
+    assert reduced.was_reduced
+    assert reduced.content.startswith("[NOTE: File reduced to fit token budget: big.py]")
+    assert reduced.estimated_tokens <= 100
+
+
+def test_token_allocation_cache_tracks_profile_and_reservation(monkeypatch):
+    _patch_dummy_provider(monkeypatch, context_window=100_000)
+    ctx = ModelContext("dummy")
+
+    default = ctx.calculate_token_allocation()
+    assert ctx.calculate_token_allocation() is default
+
+    reserved = ctx.calculate_token_allocation(reserved_for_response=5_000)
+    assert reserved is not default
+    assert reserved.response_tokens == 5_000
+    assert ctx.calculate_token_allocation(reserved_for_response=5_000) is reserved
+
+    review = ctx.calculate_token_allocation(reserved_for_response=5_000, profile=TokenProfile.CODE_REVIEW)
+    assert review is not reserved
+    assert review.file_tokens > reserved.file_tokens
+
+
+def test_profile_shares_cover_every_profile_and_size():
+    from utils.model_context import _PROFILE_SHARES
+
+    assert set(_PROFILE_SHARES) == {(profile, is_large) for profile in TokenProfile for is_large in (True, False)}
+    for shares in _PROFILE_SHARES.values():
+        assert abs(shares.files + shares.history + shares.response + shares.prompt - 1.0) < 1e-6
+
+
+def test_token_profile_shares_precompute_content_ratios():
+    from utils.model_context import TokenProfileShares
+
+    shares = TokenProfileShares(files=0.18, history=0.30, response=0.40, prompt=0.12)
+
+    assert shares.files_ratio == pytest.approx(0.30)
+    assert shares.history_ratio == pytest.approx(0.50)
+    assert shares == TokenProfileShares(files=0.18, history=0.30, response=0.40, prompt=0.12)
+    assert TokenProfileShares(files=0.0, history=0.0, response=1.0, prompt=0.0).files_ratio == 0.0
+
+
+def test_model_context_reads_context_window_once(monkeypatch):
+    calls = []
+
+    class _Provider:
+        def get_capabilities(self, model_name: str):
+            calls.append(model_name)
+            return ModelCapabilities(
+                provider=ProviderType.OPENAI,
+                model_name=model_name,
+                friendly_name="dummy",
+                context_window=400_000,
+                max_output_tokens=400_000,
+            )
+
+    from providers.registry import ModelProviderRegistry
+
+    monkeypatch.setattr(
+        ModelProviderRegistry, "get_provider_for_model", classmethod(lambda cls, model_name: _Provider())
+    )
+    ctx = ModelContext("dummy")
+
+    ctx.estimate_response_tokens(prompt_tokens=100, file_hint_count=1, profile=TokenProfile.CODE_REVIEW)
+    allocation = ctx.calculate_token_allocation(profile=TokenProfile.SYSTEM_DESIGN_REVIEW)
+
+    assert calls == ["dummy"]
+    assert allocation.total_tokens == 400_000
+    assert ctx._is_large
+
+
+def test_profile_arguments_accept_values_and_fall_back(monkeypatch):
+    _patch_dummy_provider(monkeypatch, context_window=100_000)
+    ctx = ModelContext("dummy", token_profile=TokenProfile.CODE_REVIEW)
+    review = ctx.calculate_token_allocation(profile=TokenProfile.CODE_REVIEW)
+
+    assert ctx.calculate_token_allocation(profile="code_review") is review
+    assert ctx.calculate_token_allocation(profile="unknown") is review
+    assert ctx.calculate_token_allocation(profile="default").file_tokens < review.file_tokens
+
+
+def test_estimate_tokens_uses_tokenizer_when_available(monkeypatch):
+    from utils import model_context
+
+    class _Encoding:
+        def encode(self, text, disallowed_special):
+            assert disallowed_special == ()
+            return text.split()
+
+    monkeypatch.setattr(model_context, "_tiktoken_encoding", lambda model_name: _Encoding())
+    assert ModelContext("gpt-5").estimate_tokens("one two <|endoftext|> three") == 4
+
+    monkeypatch.setattr(model_context, "_tiktoken_encoding", lambda model_name: None)
+    assert ModelContext("gpt-5").estimate_tokens("x" * 30) == 10
+
+
+def test_estimate_tokens_stops_retrying_failed_tokenizer(monkeypatch):
+    from utils import model_context
+
+    calls = []
+
+    def broken_encoding(model_name):
+        calls.append(model_name)
+        raise OSError("encoding download failed")
+
+    monkeypatch.setattr(model_context, "_TOKENIZER_UNAVAILABLE", set())
+    monkeypatch.setattr(model_context, "_tiktoken_encoding", broken_encoding)
+    ctx = ModelContext("offline-model")
+
+    assert [ctx.estimate_tokens("x" * 30) for _ in range(3)] == [10, 10, 10]
+    assert calls == ["offline-model"]
+
+
+def test_model_context_and_allocation_use_slots():
+    allocation = TokenAllocation(total_tokens=10, content_tokens=8, response_tokens=2, file_tokens=3, history_tokens=3)
+
+    assert not hasattr(allocation, "__dict__")
+    assert allocation.available_for_prompt == 2
+    assert not hasattr(ModelContext("dummy"), "__dict__")
+
+
+@pytest.mark.parametrize("context_window", [1, 7, 1_000, 128_000, 299_999, 300_000, 1_048_576])
+@pytest.mark.parametrize("profile", list(TokenProfile))
+@pytest.mark.parametrize("reserved", [None, 0, 1, 5_000, 10**9])
+def test_token_allocation_stays_within_content_budget(monkeypatch, context_window, profile, reserved):
+    _patch_dummy_provider(monkeypatch, context_window=context_window)
+
+    allocation = ModelContext("dummy").calculate_token_allocation(reserved, profile=profile)
+
+    assert allocation.response_tokens >= 1
+    assert 0 <= allocation.file_tokens
+    assert 0 <= allocation.history_tokens
+    assert allocation.file_tokens + allocation.history_tokens <= max(0, allocation.content_tokens)
+
+
+def test_token_profile_shares_reject_negative_shares():
+    from utils.model_context import TokenProfileShares
+
+    with pytest.raises(ValueError):
+        TokenProfileShares(files=0.7, history=0.5, response=0.2, prompt=-0.4).validate()
+
+
+@pytest.mark.parametrize(
+    ("profile", "context_window", "expected"),
+    [
+        (TokenProfile.CODE_REVIEW, 200_000, 2_500 + 140 * 3 + 300),
+        (TokenProfile.SYSTEM_DESIGN_REVIEW, 400_000, 3_500 + 180 * 3 + 300),
+        (TokenProfile.DEFAULT, 200_000, 3_000 + 120 * 3 + 300),
+        (TokenProfile.CODE_REVIEW, 10_000, int(10_000 * 0.23)),
+        (TokenProfile.DEFAULT, 4_000, int(4_000 * 0.40)),
+    ],
+)
+def test_estimate_response_tokens_per_profile(monkeypatch, profile, context_window, expected):
+    _patch_dummy_provider(monkeypatch, context_window=context_window)
+
+    ctx = ModelContext("dummy")
+
+    assert ctx.estimate_response_tokens(prompt_tokens=1_000, file_hint_count=3, profile=profile) == expected
+
+
+def test_model_context_interns_model_name():
+    name = "".join(["gemini", "-2.5-pro"])
+
+    assert ModelContext(name).model_name is ModelContext.from_arguments({"model": "gemini-2.5-pro"}).model_name
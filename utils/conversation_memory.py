@@ -973,7 +973,7 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     # OLDER turns first when space runs out, preserving the most contextually relevant exchanges
     turn_entries = []  # Will store (index, formatted_turn_content) for chronological ordering later
     total_turn_tokens = 0
-    file_embedding_tokens = sum(model_context.estimate_tokens(part) for part in history_parts)
+    file_embedding_tokens = sum(map(model_context.estimate_tokens, history_parts))
 
     # CRITICAL: Process turns in REVERSE chronological order (newest to oldest)
     # This prioritization strategy ensures recent context is preserved when token budget is tight
@@ -8,7 +8,11 @@ when a full file cannot fit into the remaining token budget.
 from __future__ import annotations
 
 import ast
+import os
+import re
+from collections.abc import Callable
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 from utils.token_utils import estimate_tokens
@@ -21,51 +25,205 @@ class ReducedFile:
     was_reduced: bool
 
 
+class _Budget:
+    """Outline lines collected under a running token estimate.
+
+    Each line is charged ``estimate_tokens(line) + 1`` for its newline. With the
+    character-based estimate that never undercounts the joined text, so the finished
+    outline does not need to be estimated and trimmed again.
+    """
+
+    __slots__ = ("lines", "max_tokens", "tokens_used", "exhausted")
+
+    def __init__(self, max_tokens: int) -> None:
+        self.lines: list[str] = []
+        self.max_tokens = max_tokens
+        self.tokens_used = 0
+        self.exhausted = False
+
+    def add(self, line: str, *, force: bool = False) -> bool:
+        """Append ``line`` if it fits; once a line does not fit, the budget is exhausted."""
+        if self.exhausted:
+            return False
+        cost = estimate_tokens(line) + 1
+        if not force and self.tokens_used + cost > self.max_tokens:
+            self.exhausted = True
+            return False
+        self.lines.append(line)
+        self.tokens_used += cost
+        return True
+
+    def extend(self, lines: list[str]) -> None:
+        for line in lines:
+            if not self.add(line):
+                break
+
+
+# Line breaks other than "\n" that ``str.splitlines`` also splits on.
+_OTHER_LINE_BREAKS_RE = re.compile("[\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+def _normalize_newlines(text: str) -> str:
+    # Most sources are already LF-only; a single scan avoids copying them twice.
+    if "\r" not in text:
+        return text
+    text = text.replace("\r\n", "\n")
+    if "\r" in text:
+        text = text.replace("\r", "\n")
+    return text
+
+
 def _first_nonempty_line(text: str) -> str:
-    for line in (text or "").splitlines():
-        stripped = line.strip()
+    # Scan line by line so a long docstring is not split in full for its first line.
+    text = text or ""
+    if _OTHER_LINE_BREAKS_RE.search(text):
+        # Rare separators: split the way str.splitlines does.
+        for line in text.splitlines():
+            if line.strip():
+                return line.strip()
+        return ""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end < 0:
+            end = len(text)
+        stripped = text[start:end].strip()
         if stripped:
             return stripped
+        start = end + 1
     return ""
 
 
-def _trim_to_tokens(text: str, max_tokens: int) -> str:
-    if max_tokens <= 0:
-        return ""
-    if estimate_tokens(text) <= max_tokens:
-        return text
-    lines = text.splitlines()
-    if not lines:
-        return ""
+def _build_trim_schedule() -> tuple[tuple[tuple[int, int], ...], int]:
+    """Return the (head, tail) line counts tried by ``_trim_to_tokens`` and the head-only fallback."""
 
-    # Keep head + tail and shrink until within budget.
+    steps: list[tuple[int, int]] = []
     head = 120
     tail = 60
     while head > 10 and tail > 10:
-        candidate_lines = lines[:head] + ["", "... (truncated) ...", ""] + lines[-tail:]
-        candidate = "\n".join(candidate_lines)
-        if estimate_tokens(candidate) <= max_tokens:
-            return candidate
+        steps.append((head, tail))
         head = max(10, int(head * 0.8))
         tail = max(10, int(tail * 0.8))
+    return tuple(steps), head
+
+
+_TRIM_SCHEDULE, _TRIM_FALLBACK_HEAD = _build_trim_schedule()
+_TRIM_MAX_HEAD = max(_TRIM_SCHEDULE[0][0], _TRIM_FALLBACK_HEAD, 10)
+_TRIM_MAX_TAIL = _TRIM_SCHEDULE[0][1]
+
+
+def _first_within_budget(candidate: Callable[[int], str], max_tokens: int) -> str | None:
+    """Return the first (largest) ``_TRIM_SCHEDULE`` candidate within ``max_tokens``, if any."""
+    # Candidates only shrink along the schedule, so binary-search for the first one
+    # within budget instead of estimating every step.
+    low, high = 0, len(_TRIM_SCHEDULE)
+    best = None
+    while low < high:
+        mid = (low + high) // 2
+        text = candidate(mid)
+        if estimate_tokens(text) <= max_tokens:
+            best = text
+            high = mid
+        else:
+            low = mid + 1
+    return best
+
+
+def _trim_lines_to_tokens(lines: list[str], max_tokens: int) -> str:
+    """Keep a head/tail excerpt of ``lines`` within ``max_tokens``."""
+    if not lines:
+        return ""
+
+    def _candidate(step: int) -> str:
+        head, tail = _TRIM_SCHEDULE[step]
+        return "\n".join(lines[:head] + ["", "... (truncated) ...", ""] + lines[-tail:])
+
+    best = _first_within_budget(_candidate, max_tokens)
+    if best is not None:
+        return best
+    return "\n".join(lines[: max(10, _TRIM_FALLBACK_HEAD)])
+
+
+def _trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep a head/tail excerpt of ``text`` within ``max_tokens``, split as ``str.splitlines`` would."""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if _OTHER_LINE_BREAKS_RE.search(text):
+        # Form feeds and other rare separators: fall back to splitting every line.
+        return _trim_lines_to_tokens(text.splitlines(), max_tokens)
+
+    # Only the first/last few lines are ever kept, so locate their newline offsets and
+    # slice the original text instead of splitting every line of a large file.
+    body_end = len(text) - 1 if text.endswith("\n") else len(text)
+    head_ends: list[int] = []
+    pos = -1
+    while len(head_ends) < _TRIM_MAX_HEAD:
+        pos = text.find("\n", pos + 1, body_end)
+        if pos < 0:
+            break
+        head_ends.append(pos)
+    tail_starts: list[int] = []
+    pos = body_end
+    while len(tail_starts) < _TRIM_MAX_TAIL:
+        pos = text.rfind("\n", 0, pos)
+        if pos < 0:
+            break
+        tail_starts.append(pos + 1)
+
+    def _head(lines: int) -> str:
+        return text[: head_ends[lines - 1] if lines <= len(head_ends) else body_end]
+
+    def _candidate(step: int) -> str:
+        head, tail = _TRIM_SCHEDULE[step]
+        tail_start = tail_starts[tail - 1] if tail <= len(tail_starts) else 0
+        return _head(head) + "\n\n... (truncated) ...\n\n" + text[tail_start:body_end]
+
+    best = _first_within_budget(_candidate, max_tokens)
+    if best is not None:
+        return best
 
     # Final fallback: only head.
-    candidate = "\n".join(lines[: max(10, head)])
-    return candidate
+    return _head(max(10, _TRIM_FALLBACK_HEAD))
+
+
+# Below this budget the outline note plus a couple of signatures would use it all up.
+_MIN_OUTLINE_TOKENS = 150
+
+
+@lru_cache(maxsize=64)
+def _parse_cached(path: str, mtime_ns: int, size: int) -> ast.Module:
+    return ast.parse(Path(path).read_text(encoding="utf-8", errors="replace"))
 
 
-def reduce_python_source(source: str, *, max_tokens: int) -> ReducedFile:
+def parse_python_file(path: str | Path) -> ast.Module | None:
+    """Parse a Python file, reusing the tree while the file's mtime and size are unchanged."""
+    try:
+        st = os.stat(path)
+        return _parse_cached(str(path), st.st_mtime_ns, st.st_size)
+    except Exception:
+        return None
+
+
+def reduce_python_source(source: str, *, max_tokens: int, file_path: str | None = None) -> ReducedFile:
     if estimate_tokens(source) <= max_tokens:
         return ReducedFile(content=source, estimated_tokens=estimate_tokens(source), was_reduced=False)
+    if max_tokens < _MIN_OUTLINE_TOKENS:
+        # Too small for a useful outline; skip the parse and keep a head/tail excerpt.
+        return reduce_generic_text(source, max_tokens=max_tokens, file_path=file_path)
 
-    normalized = source.replace("\r\n", "\n").replace("\r", "\n")
+    normalized = _normalize_newlines(source)
     lines = normalized.split("\n")
 
-    outline_parts: list[str] = []
-    outline_parts.append("[NOTE: File reduced to fit token budget. Showing outline of structure.]")
+    budget = _Budget(max_tokens)
+    budget.add("[NOTE: File reduced to fit token budget. Showing outline of structure.]", force=True)
 
+    # Reuse the tree from dependency collection when the source came from this file.
+    tree = parse_python_file(file_path) if file_path else None
     try:
-        tree = ast.parse(normalized)
+        if tree is None:
+            tree = ast.parse(normalized)
     except Exception:
         snippet = _trim_to_tokens(normalized, max_tokens=max(0, max_tokens - 50))
         content = "\n".join(
@@ -78,21 +236,25 @@ def reduce_python_source(source: str, *, max_tokens: int) -> ReducedFile:
         content = _trim_to_tokens(content, max_tokens=max_tokens)
         return ReducedFile(content=content, estimated_tokens=estimate_tokens(content), was_reduced=True)
 
-    # Imports first (cheap signal).
+    # One pass over the module: imports go straight into the outline (cheap signal),
+    # definitions are set aside so they still come after every import.
+    definitions: list[ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef] = []
     for node in tree.body:
-        if isinstance(node, (ast.Import, ast.ImportFrom)):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            definitions.append(node)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)) and not budget.exhausted:
             start = getattr(node, "lineno", None)
             end = getattr(node, "end_lineno", None) or start
             if start is None:
                 continue
             start = max(1, start)
             end = max(start, end or start)
-            outline_parts.extend(lines[start - 1 : min(len(lines), end)])
+            budget.extend(lines[start - 1 : min(len(lines), end)])
 
     # Then top-level class/function signatures (+ docstring line if present).
-    for node in tree.body:
-        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-            continue
+    for node in definitions:
+        if budget.exhausted:
+            break
 
         start = getattr(node, "lineno", None)
         if start is None:
@@ -105,12 +267,9 @@ def reduce_python_source(source: str, *, max_tokens: int) -> ReducedFile:
 
         start = max(1, start)
         # Capture signature lines until ':' is seen or 12 lines.
-        signature_lines: list[str] = []
         for i in range(start - 1, min(len(lines), start - 1 + 12)):
-            signature_lines.append(lines[i])
-            if ":" in lines[i]:
+            if not budget.add(lines[i]) or ":" in lines[i]:
                 break
-        outline_parts.extend(signature_lines)
 
         # Docstring (first statement) if present.
         try:
@@ -119,12 +278,14 @@ def reduce_python_source(source: str, *, max_tokens: int) -> ReducedFile:
                 if isinstance(doc, str):
                     doc_line = _first_nonempty_line(doc)
                     if doc_line:
-                        outline_parts.append(f'""" {doc_line} """')
+                        budget.add(f'""" {doc_line} """')
         except Exception:
             pass
 
-    reduced = "\n".join(outline_parts)
-    reduced = _trim_to_tokens(reduced, max_tokens=max_tokens)
+    reduced = "\n".join(budget.lines)
+    if budget.tokens_used > max_tokens:
+        # Only the forced note can overshoot (tiny budgets); fall back to a plain trim.
+        reduced = _trim_to_tokens(reduced, max_tokens=max_tokens)
     return ReducedFile(content=reduced, estimated_tokens=estimate_tokens(reduced), was_reduced=True)
 
 
@@ -132,7 +293,7 @@ def reduce_generic_text(source: str, *, max_tokens: int, file_path: str | None =
     if estimate_tokens(source) <= max_tokens:
         return ReducedFile(content=source, estimated_tokens=estimate_tokens(source), was_reduced=False)
 
-    normalized = source.replace("\r\n", "\n").replace("\r", "\n")
+    normalized = _normalize_newlines(source)
     header = "[NOTE: File reduced to fit token budget. Showing head/tail excerpt.]"
     if file_path:
         header = f"[NOTE: File reduced to fit token budget: {Path(file_path).name}]"
@@ -9,13 +9,17 @@ from __future__ import annotations
 
 import os
 import re
+import sys
 import ast
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
-from utils.file_types import get_file_category
+from utils.file_reduction import parse_python_file
+from utils.file_types import FILE_CATEGORIES
 
 
 @dataclass(frozen=True)
@@ -29,7 +33,7 @@ class FileRankingContext:
     max_dependency_files: int = 200
 
 
-_PATHLIKE_RE = re.compile(r"(?P<path>(?:[A-Za-z]:)?[\\w./\\\\-]+\\.[A-Za-z0-9_]{1,8})")
+_PATHLIKE_RE = re.compile(r"(?:[A-Za-z]:)?[\w./\\-]+\.[A-Za-z0-9_]{1,8}")
 _LOCKFILE_NAMES = {
     "package-lock.json",
     "yarn.lock",
@@ -63,47 +67,67 @@ def infer_project_root(paths: Iterable[str]) -> str | None:
 def extract_path_mentions(prompt: str) -> set[str]:
     if not prompt:
         return set()
-    mentions = set()
-    for match in _PATHLIKE_RE.finditer(prompt):
-        mentions.add(match.group("path"))
-    return mentions
+    return set(_PATHLIKE_RE.findall(prompt))
+
+
+_CATEGORY_WEIGHTS = {
+    "programming": 1.0,
+    "scripts": 0.9,
+    "web": 0.7,
+    "configs": 0.6,
+    "docs": 0.4,
+    "text_data": 0.2,
+}
+_DEFAULT_TYPE_WEIGHT = 0.3
+
+
+def _build_extension_weights() -> dict[str, float]:
+    # Same precedence as get_file_category: the first category listing an extension wins.
+    weights: dict[str, float] = {}
+    for category, extensions in FILE_CATEGORIES.items():
+        for extension in extensions:
+            weights.setdefault(extension, _CATEGORY_WEIGHTS.get(category, _DEFAULT_TYPE_WEIGHT))
+    return weights
+
+
+_EXTENSION_WEIGHTS = _build_extension_weights()
 
 
-@lru_cache(maxsize=8_192)
 def file_type_weight(file_path: str) -> float:
-    name = Path(file_path).name.lower()
+    name = os.path.basename(file_path).lower()
     if name in _LOCKFILE_NAMES or name.endswith(".lock"):
         return 0.05
     if name.endswith(".min.js") or name.endswith(".min.css"):
         return 0.10
 
-    category = get_file_category(file_path)
-    if category == "programming":
-        return 1.0
-    if category == "scripts":
-        return 0.9
-    if category == "web":
-        return 0.7
-    if category == "configs":
-        return 0.6
-    if category == "docs":
-        return 0.4
-    if category == "text_data":
-        return 0.2
-    return 0.3
+    return _EXTENSION_WEIGHTS.get(os.path.splitext(name)[1], _DEFAULT_TYPE_WEIGHT)
 
 
 def _normalize_path_set(paths: Iterable[str]) -> set[str]:
     normalized = set()
     for path in paths:
         try:
-            normalized.add(str(Path(path).resolve()))
+            normalized.add(os.path.realpath(path))
         except Exception:
             normalized.add(path)
     return normalized
 
 
-def rank_files(files: list[str], *, ctx: FileRankingContext) -> list[str]:
+@lru_cache(maxsize=128)
+def _resolved_explicit_paths(paths: frozenset[str]) -> frozenset[str]:
+    # Explicit file sets repeat across retries and conversation turns; resolve them once.
+    return frozenset(_normalize_path_set(paths))
+
+
+def _best_first(scored: list[tuple[float, str]], top_k: int | None) -> list[str]:
+    if top_k is not None and top_k < len(scored):
+        scored = heapq.nlargest(top_k, scored)
+    else:
+        scored.sort(reverse=True)
+    return [path for _score, path in scored]
+
+
+def rank_files(files: list[str], *, ctx: FileRankingContext, top_k: int | None = None) -> list[str]:
     """
     Rank files in descending order of relevance for review tasks.
 
@@ -111,30 +135,36 @@ def rank_files(files: list[str], *, ctx: FileRankingContext) -> list[str]:
     - explicit path mentions
     - file type weighting (source > docs > lock)
     - optional recency ordering (lower index == more recent)
+
+    Without a prompt, explicit paths or recency there is nothing to match against
+    resolved paths, so files are ordered by type weight alone and returned as given.
+
+    When ``top_k`` is given only the ``top_k`` best files are returned, selected with a
+    heap instead of sorting the full list.
     """
 
-    explicit = _normalize_path_set(ctx.explicit_paths)
+    if not ctx.prompt and not ctx.explicit_paths and not ctx.recency_order:
+        weighted = [(file_type_weight(file_path), file_path) for file_path in files]
+        return _best_first(weighted, top_k)
+
+    explicit = _resolved_explicit_paths(frozenset(ctx.explicit_paths))
     mentioned_tokens = extract_path_mentions(ctx.prompt)
+    # Resolve each file once; both passes below work on the resolved paths.
+    resolved_files = [os.path.realpath(file_path) for file_path in files]
 
-    # Map mention tokens to actual files by suffix/basename match.
+    # Map mention tokens to actual files: bare names by exact basename, paths by suffix.
     mention_hits: set[str] = set()
     if mentioned_tokens:
-        for file_path in files:
-            resolved = str(Path(file_path).resolve())
-            basename = Path(resolved).name
-            for token in mentioned_tokens:
-                if token == basename:
-                    mention_hits.add(resolved)
-                    break
-                if ("/" in token or "\\" in token) and resolved.endswith(token):
-                    mention_hits.add(resolved)
-                    break
+        path_mentions = tuple(token for token in mentioned_tokens if "/" in token or "\\" in token)
+        basename_mentions = mentioned_tokens.difference(path_mentions)
+        for resolved in resolved_files:
+            if os.path.basename(resolved) in basename_mentions or (path_mentions and resolved.endswith(path_mentions)):
+                mention_hits.add(resolved)
 
     recency = ctx.recency_order or {}
 
     scored: list[tuple[float, str]] = []
-    for file_path in files:
-        resolved = str(Path(file_path).resolve())
+    for resolved in resolved_files:
         score = 0.0
 
         if resolved in explicit:
@@ -150,8 +180,29 @@ def rank_files(files: list[str], *, ctx: FileRankingContext) -> list[str]:
 
         scored.append((score, resolved))
 
-    scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
-    return [path for _score, path in scored]
+    return _best_first(scored, top_k)
+
+
+# Top-level stdlib packages can never resolve to project files (empty before 3.10).
+_STDLIB_MODULES = frozenset(getattr(sys, "stdlib_module_names", ()))
+
+_STATEMENT_BLOCK_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+
+def _iter_import_nodes(statements: list[ast.AST]) -> Iterator[ast.Import | ast.ImportFrom]:
+    """Yield import statements, descending only into nested statement blocks.
+
+    Imports are statements, so expression subtrees (the bulk of a module's nodes)
+    never need visiting. Function-local and guarded imports are still found.
+    """
+    for node in statements:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+            continue
+        for field in _STATEMENT_BLOCK_FIELDS:
+            block = getattr(node, field, None)
+            if block and isinstance(block, list):
+                yield from _iter_import_nodes(block)
 
 
 def collect_python_dependencies(*, seed_files: Iterable[str], project_root: str | None, max_files: int) -> set[str]:
@@ -164,65 +215,90 @@ def collect_python_dependencies(*, seed_files: Iterable[str], project_root: str
     if not project_root:
         return set()
 
-    root = Path(project_root)
     resolved: set[str] = set()
-    queue: list[Path] = []
+    queue: list[str] = []
+    # Seeds commonly share imports; probe each candidate path only once per call.
+    file_exists_cache: dict[str, bool] = {}
+
+    def _is_file(path: str) -> bool:
+        exists = file_exists_cache.get(path)
+        if exists is None:
+            exists = file_exists_cache[path] = os.path.isfile(path)
+        return exists
 
     for path in seed_files:
         try:
-            p = Path(path)
-        except Exception:
+            path = os.fspath(path)
+        except TypeError:
             continue
-        if p.is_file() and p.suffix.lower() == ".py":
-            queue.append(p)
-
-    def _resolve_module(module: str) -> set[Path]:
-        candidates: set[Path] = set()
-        if not module:
-            return candidates
-        rel = Path(*module.split("."))
-        candidates.add(root / (str(rel) + ".py"))
-        candidates.add(root / rel / "__init__.py")
-        return candidates
-
-    for seed in queue:
+        if os.path.splitext(path)[1].lower() == ".py" and _is_file(path):
+            queue.append(path)
+
+    def _module_candidates(base: str, module: str) -> tuple[str, str]:
+        module_path = os.path.join(base, *module.split("."))
+        return module_path + ".py", os.path.join(module_path, "__init__.py")
+
+    # Absolute imports resolve only if their top-level package sits directly under the root,
+    # so one listing of the root rules out third-party modules without probing candidates.
+    root_entries: set[str] | None = None
+
+    def _resolve_module(module: str) -> tuple[str, ...]:
+        nonlocal root_entries
+        top_level = module.partition(".")[0]
+        if not module or top_level in _STDLIB_MODULES:
+            return ()
+        if root_entries is None:
+            try:
+                root_entries = set(os.listdir(project_root))
+            except OSError:
+                root_entries = set()
+        if top_level not in root_entries and f"{top_level}.py" not in root_entries:
+            return ()
+        return _module_candidates(project_root, module)
+
+    # Read and parse seeds in parallel to overlap file I/O; resolution stays on this thread
+    # and walks seeds in sorted order so the max_files cut-off is deterministic.
+    queue.sort()
+    if len(queue) > 1:
+        with ThreadPoolExecutor(max_workers=min(8, len(queue))) as pool:
+            trees = list(pool.map(parse_python_file, queue))
+    else:
+        trees = [parse_python_file(seed) for seed in queue]
+
+    for seed, tree in zip(queue, trees):
         if len(resolved) >= max_files:
             break
-        try:
-            text = seed.read_text(encoding="utf-8", errors="replace")
-            tree = ast.parse(text)
-        except Exception:
+        if tree is None:
             continue
 
-        for node in ast.walk(tree):
+        for node in _iter_import_nodes(tree.body):
             if len(resolved) >= max_files:
                 break
             if isinstance(node, ast.Import):
                 for alias in node.names:
                     for candidate in _resolve_module(alias.name):
-                        if candidate.is_file():
-                            resolved.add(str(candidate.resolve()))
+                        if _is_file(candidate):
+                            resolved.add(os.path.realpath(candidate))
             elif isinstance(node, ast.ImportFrom):
                 module = node.module or ""
                 if node.level and node.level > 0:
                     # Resolve relative to seed's directory.
-                    base = seed.parent
+                    base = os.path.dirname(seed)
                     for _ in range(node.level - 1):
-                        base = base.parent
-                    rel = Path(*module.split(".")) if module else Path()
-                    candidates = {base / (str(rel) + ".py"), base / rel / "__init__.py"}
-                    # Handle "from . import foo" (module == ""). Include imported names as modules.
-                    if not module:
+                        base = os.path.dirname(base)
+                    if module:
+                        candidates = set(_module_candidates(base, module))
+                    else:
+                        # Handle "from . import foo": include the package and imported names as modules.
+                        candidates = {os.path.join(base, "__init__.py")}
                         for alias in node.names:
-                            name_rel = Path(alias.name)
-                            candidates.add(base / (str(name_rel) + ".py"))
-                            candidates.add(base / name_rel / "__init__.py")
+                            candidates.update(_module_candidates(base, alias.name))
                     for candidate in candidates:
-                        if candidate.is_file():
-                            resolved.add(str(candidate.resolve()))
+                        if _is_file(candidate):
+                            resolved.add(os.path.realpath(candidate))
                 else:
                     for candidate in _resolve_module(module):
-                        if candidate.is_file():
-                            resolved.add(str(candidate.resolve()))
+                        if _is_file(candidate):
+                            resolved.add(os.path.realpath(candidate))
 
     return resolved
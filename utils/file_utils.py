@@ -665,7 +665,9 @@ def read_files_with_manifest(
 
                             extension = Path(file_path).suffix.lower()
                             if extension == ".py":
-                                reduced = reduce_python_source(raw, max_tokens=max(0, remaining - 200))
+                                reduced = reduce_python_source(
+                                    raw, max_tokens=max(0, remaining - 200), file_path=file_path
+                                )
                             else:
                                 reduced = reduce_generic_text(raw, max_tokens=max(0, remaining - 200), file_path=file_path)
 
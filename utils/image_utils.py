@@ -9,7 +9,7 @@ from utils.file_types import IMAGES, get_image_mime_type
 
 DEFAULT_MAX_IMAGE_SIZE_MB = 20.0
 
-__all__ = ["DEFAULT_MAX_IMAGE_SIZE_MB", "validate_image"]
+__all__ = ["DEFAULT_MAX_IMAGE_SIZE_MB", "build_image_data_url", "validate_image"]
 
 
 def _valid_mime_types() -> Iterable[str]:
@@ -39,6 +39,15 @@ def validate_image(image_path: str, max_size_mb: float = None) -> tuple[bytes, s
     return _validate_file_path(image_path, max_size_mb)
 
 
+def build_image_data_url(image_bytes: bytes, mime_type: str) -> str:
+    """Return a ``data:`` URL embedding ``image_bytes`` as base64.
+
+    The URL is assembled as bytes and decoded once, so the encoded payload is
+    not copied into an intermediate ``str`` before the final one.
+    """
+    return (b"data:%s;base64,%s" % (mime_type.encode("ascii"), base64.b64encode(image_bytes))).decode("ascii")
+
+
 def _validate_data_url(image_data_url: str, max_size_mb: float) -> tuple[bytes, str]:
     """Validate a data URL and return image bytes plus MIME type."""
     try:
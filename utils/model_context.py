@@ -27,20 +27,27 @@ optimal token allocation for multi-turn conversations:
 """
 
 import logging
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Optional
 
 from config import DEFAULT_MODEL
 from providers import ModelCapabilities, ModelProviderRegistry
+from providers.openai_compatible import _tiktoken_encoding
 
 logger = logging.getLogger(__name__)
 
+# Models whose tokenizer failed to load; estimate_tokens uses the character estimate for them.
+_TOKENIZER_UNAVAILABLE: set[str] = set()
+
 
 @dataclass
 class TokenAllocation:
     """Token allocation strategy for a model."""
 
+    __slots__ = ("total_tokens", "content_tokens", "response_tokens", "file_tokens", "history_tokens")
+
     total_tokens: int
     content_tokens: int
     response_tokens: int
@@ -67,8 +74,21 @@ class TokenProfileShares:
     history: float
     response: float
     prompt: float
+    # Fractions of the non-response (content) budget given to files/history, derived once.
+    files_ratio: float = field(init=False, repr=False, compare=False)
+    history_ratio: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        non_response = self.files + self.history + self.prompt
+        if non_response <= 0:
+            # Defensive fallback to avoid division by zero on misconfiguration; validate() rejects these.
+            non_response = 1.0 - self.response
+        object.__setattr__(self, "files_ratio", self.files / non_response if non_response > 0 else 0.0)
+        object.__setattr__(self, "history_ratio", self.history / non_response if non_response > 0 else 0.0)
 
     def validate(self) -> None:
+        if min(self.files, self.history, self.response, self.prompt) < 0:
+            raise ValueError("TokenProfileShares must not contain negative shares")
         total = self.files + self.history + self.response + self.prompt
         if abs(total - 1.0) > 1e-6:
             raise ValueError(f"TokenProfileShares must sum to 1.0, got {total}")
@@ -77,6 +97,44 @@ class TokenProfileShares:
             raise ValueError("TokenProfileShares must reserve some non-response tokens for content/history/prompt")
 
 
+_PROFILE_BY_VALUE = {profile.value: profile for profile in TokenProfile}
+
+
+def _build_profile_shares() -> dict[tuple[TokenProfile, bool], TokenProfileShares]:
+    """Return the validated shares for every (profile, is_large) combination."""
+    table = {
+        (TokenProfile.CODE_REVIEW, True): TokenProfileShares(files=0.50, history=0.15, response=0.20, prompt=0.15),
+        (TokenProfile.CODE_REVIEW, False): TokenProfileShares(files=0.45, history=0.12, response=0.23, prompt=0.20),
+        (TokenProfile.SYSTEM_DESIGN_REVIEW, True): TokenProfileShares(
+            files=0.60, history=0.10, response=0.20, prompt=0.10
+        ),
+        (TokenProfile.SYSTEM_DESIGN_REVIEW, False): TokenProfileShares(
+            files=0.55, history=0.10, response=0.22, prompt=0.13
+        ),
+        # Default profile retains legacy behavior via shares approximating the prior ratios:
+        # - small: content 60 / response 40; within content: files 30%, history 50%, prompt 20%
+        #   => files 18%, history 30%, prompt 12%, response 40%
+        # - large: content 80 / response 20; within content: files 40%, history 40%, prompt 20%
+        #   => files 32%, history 32%, prompt 16%, response 20%
+        (TokenProfile.DEFAULT, True): TokenProfileShares(files=0.32, history=0.32, response=0.20, prompt=0.16),
+        (TokenProfile.DEFAULT, False): TokenProfileShares(files=0.18, history=0.30, response=0.40, prompt=0.12),
+    }
+    for shares in table.values():
+        shares.validate()
+    return table
+
+
+# Shares are defined as proportions of the total context window.
+_PROFILE_SHARES = _build_profile_shares()
+
+# Response estimate per profile: (base tokens, tokens per hinted file).
+_RESPONSE_ESTIMATE_PARAMS: dict[TokenProfile, tuple[int, int]] = {
+    TokenProfile.CODE_REVIEW: (2_500, 140),
+    TokenProfile.SYSTEM_DESIGN_REVIEW: (3_500, 180),
+    TokenProfile.DEFAULT: (3_000, 120),
+}
+
+
 class ModelContext:
     """
     Encapsulates model-specific information and token calculations.
@@ -85,6 +143,20 @@ class ModelContext:
     token calculations, ensuring consistency across the system.
     """
 
+    __slots__ = (
+        "model_name",
+        "model_option",
+        "token_profile",
+        "_provider",
+        "_capabilities",
+        "_total_tokens",
+        "_is_large",
+        "_token_allocation",
+        "_cache_profile",
+        "_cache_reserved",
+        "_preferred_response_tokens",
+    )
+
     def __init__(
         self,
         model_name: str,
@@ -92,7 +164,9 @@ class ModelContext:
         *,
         token_profile: TokenProfile | str = TokenProfile.DEFAULT,
     ):
-        self.model_name = model_name
+        # Model names come from freshly parsed JSON; interning makes the provider/tokenizer
+        # cache lookups keyed on them compare by identity.
+        self.model_name = sys.intern(model_name) if type(model_name) is str else model_name
         self.model_option = model_option  # Store optional model option (e.g., "for", "against", etc.)
         try:
             self.token_profile = TokenProfile(token_profile)
@@ -100,8 +174,13 @@ class ModelContext:
             self.token_profile = TokenProfile.DEFAULT
         self._provider = None
         self._capabilities = None
+        # Context window size and large-model flag, read from capabilities on first use.
+        self._total_tokens: int | None = None
+        self._is_large = False
         self._token_allocation = None
-        self._token_allocation_key: tuple[str, int | None] | None = None
+        # Profile/reservation the cached allocation was computed for.
+        self._cache_profile: TokenProfile | None = None
+        self._cache_reserved: int | None = None
         self._preferred_response_tokens: int | None = None
 
     @property
@@ -130,6 +209,22 @@ class ModelContext:
             self._capabilities = self.provider.get_capabilities(self.model_name)
         return self._capabilities
 
+    def _resolve_profile(self, profile: TokenProfile | str | None) -> TokenProfile:
+        """Map a profile argument to a TokenProfile, falling back to this context's profile."""
+        if isinstance(profile, TokenProfile):
+            return profile
+        if profile is None:
+            return self.token_profile
+        return _PROFILE_BY_VALUE.get(profile, self.token_profile)
+
+    def _ensure_caps(self) -> int:
+        """Return the context window, caching it and the large-model flag on first use."""
+        if self._total_tokens is None:
+            total_tokens = self.capabilities.context_window
+            self._is_large = total_tokens >= 300_000
+            self._total_tokens = total_tokens
+        return self._total_tokens
+
     def calculate_token_allocation(
         self,
         reserved_for_response: Optional[int] = None,
@@ -164,59 +259,27 @@ class ModelContext:
         Returns:
             TokenAllocation with calculated budgets for dual prioritization strategy
         """
-        resolved_profile = TokenProfile(profile) if profile is not None else self.token_profile
+        resolved_profile = self._resolve_profile(profile)
         effective_reserved = self._preferred_response_tokens if reserved_for_response is None else reserved_for_response
-        cache_key = (resolved_profile.value, effective_reserved)
-        if self._token_allocation is not None and self._token_allocation_key == cache_key:
+        if (
+            self._token_allocation is not None
+            and self._cache_profile is resolved_profile
+            and self._cache_reserved == effective_reserved
+        ):
             return self._token_allocation
 
-        total_tokens = self.capabilities.context_window
-
-        def _profile_shares(*, is_large: bool) -> TokenProfileShares:
-            # Default profile retains legacy behavior via shares approximating the prior ratios.
-            # Shares are defined as proportions of the total context window.
-            if resolved_profile == TokenProfile.CODE_REVIEW:
-                if is_large:
-                    shares = TokenProfileShares(files=0.50, history=0.15, response=0.20, prompt=0.15)
-                else:
-                    shares = TokenProfileShares(files=0.45, history=0.12, response=0.23, prompt=0.20)
-            elif resolved_profile == TokenProfile.SYSTEM_DESIGN_REVIEW:
-                if is_large:
-                    shares = TokenProfileShares(files=0.60, history=0.10, response=0.20, prompt=0.10)
-                else:
-                    shares = TokenProfileShares(files=0.55, history=0.10, response=0.22, prompt=0.13)
-            else:
-                # Legacy ratios:
-                # - small: content 60 / response 40; within content: files 30%, history 50%, prompt 20%
-                #   => files 18%, history 30%, prompt 12%, response 40%
-                # - large: content 80 / response 20; within content: files 40%, history 40%, prompt 20%
-                #   => files 32%, history 32%, prompt 16%, response 20%
-                if is_large:
-                    shares = TokenProfileShares(files=0.32, history=0.32, response=0.20, prompt=0.16)
-                else:
-                    shares = TokenProfileShares(files=0.18, history=0.30, response=0.40, prompt=0.12)
-            shares.validate()
-            return shares
-
-        is_large = total_tokens >= 300_000
-        shares = _profile_shares(is_large=is_large)
+        total_tokens = self._ensure_caps()
+        shares = _PROFILE_SHARES[(resolved_profile, self._is_large)]
 
         max_response_tokens = int(total_tokens * shares.response)
         response_tokens = max_response_tokens if effective_reserved is None else min(effective_reserved, max_response_tokens)
         response_tokens = max(1, response_tokens)
 
         content_tokens = total_tokens - response_tokens
-        non_response_share_total = shares.files + shares.history + shares.prompt
-        if non_response_share_total <= 0:
-            # Defensive fallback to avoid division by zero on misconfiguration.
-            non_response_share_total = 1.0 - shares.response
-
-        file_tokens = int(content_tokens * (shares.files / non_response_share_total))
-        history_tokens = int(content_tokens * (shares.history / non_response_share_total))
-
-        # Ensure invariants: file/history budgets cannot exceed content budget.
-        file_tokens = min(file_tokens, max(0, content_tokens))
-        history_tokens = min(history_tokens, max(0, content_tokens - file_tokens))
+        # Validated shares are non-negative with files_ratio + history_ratio <= 1, so these
+        # truncated products never exceed the content budget and need no clamping.
+        file_tokens = int(content_tokens * shares.files_ratio)
+        history_tokens = int(content_tokens * shares.history_ratio)
 
         allocation = TokenAllocation(
             total_tokens=total_tokens,
@@ -226,16 +289,18 @@ class ModelContext:
             history_tokens=history_tokens,
         )
 
-        logger.debug(f"Token allocation for {self.model_name} ({resolved_profile.value}):")
-        logger.debug(f"  Total: {allocation.total_tokens:,}")
-        logger.debug(f"  Content: {allocation.content_tokens:,} ({allocation.content_tokens / total_tokens:.0%})")
-        logger.debug(f"  Response: {allocation.response_tokens:,} (cap={max_response_tokens:,})")
-        logger.debug(f"  Files: {allocation.file_tokens:,}")
-        logger.debug(f"  History: {allocation.history_tokens:,}")
-        logger.debug(f"  Prompt: {allocation.available_for_prompt:,}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Token allocation for {self.model_name} ({resolved_profile.value}):")
+            logger.debug(f"  Total: {allocation.total_tokens:,}")
+            logger.debug(f"  Content: {allocation.content_tokens:,} ({allocation.content_tokens / total_tokens:.0%})")
+            logger.debug(f"  Response: {allocation.response_tokens:,} (cap={max_response_tokens:,})")
+            logger.debug(f"  Files: {allocation.file_tokens:,}")
+            logger.debug(f"  History: {allocation.history_tokens:,}")
+            logger.debug(f"  Prompt: {allocation.available_for_prompt:,}")
 
         self._token_allocation = allocation
-        self._token_allocation_key = cache_key
+        self._cache_profile = resolved_profile
+        self._cache_reserved = effective_reserved
         return allocation
 
     def estimate_response_tokens(
@@ -253,23 +318,11 @@ class ModelContext:
 
         The estimate is capped by the profile's response share.
         """
-        resolved_profile = TokenProfile(profile) if profile is not None else self.token_profile
-        total_tokens = self.capabilities.context_window
-        is_large = total_tokens >= 300_000
-
-        # Mirror the profile response share caps from calculate_token_allocation.
-        if resolved_profile == TokenProfile.CODE_REVIEW:
-            response_share = 0.20 if is_large else 0.23
-            base = 2_500
-            per_file = 140
-        elif resolved_profile == TokenProfile.SYSTEM_DESIGN_REVIEW:
-            response_share = 0.20 if is_large else 0.22
-            base = 3_500
-            per_file = 180
-        else:
-            response_share = 0.20 if is_large else 0.40
-            base = 3_000
-            per_file = 120
+        resolved_profile = self._resolve_profile(profile)
+        total_tokens = self._ensure_caps()
+        # Cap at the same response share calculate_token_allocation uses for this profile.
+        response_share = _PROFILE_SHARES[(resolved_profile, self._is_large)].response
+        base, per_file = _RESPONSE_ESTIMATE_PARAMS[resolved_profile]
 
         response_cap = int(total_tokens * response_share)
         if response_cap <= 0:
@@ -289,11 +342,18 @@ class ModelContext:
         """
         Estimate token count for text using model-specific tokenizer.
 
-        For now, uses simple estimation. Can be enhanced with model-specific
-        tokenizers (tiktoken for OpenAI, etc.) in the future.
+        Uses the model's tiktoken encoding (cl100k_base for models tiktoken does not know)
+        when tiktoken is installed, and a conservative character estimate otherwise.
         """
-        # TODO: Integrate model-specific tokenizers
-        # For now, use conservative estimation
+        if self.model_name not in _TOKENIZER_UNAVAILABLE:
+            try:
+                encoding = _tiktoken_encoding(self.model_name)
+                if encoding is not None:
+                    return len(encoding.encode(text, disallowed_special=()))
+            except Exception as exc:
+                # Don't retry (e.g. an encoding download) on every estimate.
+                _TOKENIZER_UNAVAILABLE.add(self.model_name)
+                logger.debug("Tokenizer unavailable for %s: %s", self.model_name, exc)
         return len(text) // 3  # Conservative estimate
 
     @classmethod
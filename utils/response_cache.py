@@ -0,0 +1,77 @@
+"""
+Opt-in on-disk cache for identical model completions.
+
+Set ``PALLY_RESPONSE_CACHE_DIR`` to a writable directory to enable it. Each
+completion is stored as a JSON file named after the SHA-256 of the provider,
+model and full request parameters, so repeating an identical request (retries,
+test suites, agent loops) returns the stored response without a network call.
+
+The cache is disabled by default because model output is not deterministic:
+only enable it where replaying an earlier answer is acceptable.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from providers.shared import ModelResponse, ProviderType
+from utils.env import get_env
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_DIR_ENV = "PALLY_RESPONSE_CACHE_DIR"
+
+
+def get_response_cache_dir() -> Path | None:
+    """Return the configured cache directory, or None when caching is disabled."""
+
+    raw = (get_env(RESPONSE_CACHE_DIR_ENV, "") or "").strip()
+    return Path(raw).expanduser() if raw else None
+
+
+def response_cache_key(provider_type: ProviderType, model_name: str, request: Any) -> str:
+    """Return the content address for a request (stable across dict key ordering)."""
+
+    payload = json.dumps([provider_type.value, model_name, request], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_cached_response(cache_dir: Path, key: str) -> ModelResponse | None:
+    """Load a cached response, treating unreadable or malformed entries as misses."""
+
+    path = cache_dir / f"{key}.json"
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        data["provider"] = ProviderType(data["provider"])
+        return ModelResponse(**data)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.debug("Ignoring unreadable response cache entry %s: %s", path, exc)
+        return None
+
+
+def store_cached_response(cache_dir: Path, key: str, response: ModelResponse) -> None:
+    """Persist a response atomically; failures are logged and otherwise ignored."""
+
+    data = asdict(response)
+    data["provider"] = response.provider.value
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=f".{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, ensure_ascii=False, default=str)
+            os.replace(tmp_path, cache_dir / f"{key}.json")
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except Exception as exc:
+        logger.warning("Failed to write response cache entry %s: %s", key, exc)